@@ -0,0 +1,48 @@
+"""Store refresh token hashes
+
+Revision ID: 5b8e1d3c9f27
+Revises: 02fe4e9c4c15
+Create Date: 2026-10-15 10:12:08.214551
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5b8e1d3c9f27"
+down_revision = "02fe4e9c4c15"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "refresh_tokens",
+        sa.Column("token_hash", sa.LargeBinary(length=32), nullable=True),
+    )
+    # Hash existing tokens in place so active sessions survive the upgrade.
+    op.execute(
+        "UPDATE refresh_tokens SET token_hash = sha256(convert_to(token, 'UTF8'))"
+    )
+    op.alter_column("refresh_tokens", "token_hash", nullable=False)
+    op.create_unique_constraint(
+        "refresh_tokens_token_hash_key", "refresh_tokens", ["token_hash"]
+    )
+    op.drop_column("refresh_tokens", "token")
+
+
+def downgrade() -> None:
+    op.add_column(
+        "refresh_tokens",
+        sa.Column("token", sa.String(length=512), nullable=True),
+    )
+    # Plaintext tokens cannot be recovered from their hashes: fill the column
+    # with unique placeholders and revoke every session instead.
+    op.execute(
+        "UPDATE refresh_tokens SET token = encode(token_hash, 'hex'), revoked = true"
+    )
+    op.alter_column("refresh_tokens", "token", nullable=False)
+    op.create_unique_constraint("refresh_tokens_token_key", "refresh_tokens", ["token"])
+    op.drop_column("refresh_tokens", "token_hash")
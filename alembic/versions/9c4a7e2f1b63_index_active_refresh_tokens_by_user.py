@@ -0,0 +1,40 @@
+"""Index active refresh tokens by user
+
+Revision ID: 9c4a7e2f1b63
+Revises: 5b8e1d3c9f27
+Create Date: 2026-10-15 11:03:41.877120
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9c4a7e2f1b63"
+down_revision = "5b8e1d3c9f27"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY avoids blocking token writes while the index builds; it
+    # cannot run inside a transaction, hence the autocommit block.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "refresh_tokens_user_active_idx",
+            "refresh_tokens",
+            ["user_id"],
+            unique=False,
+            postgresql_where=sa.text("revoked = false"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "refresh_tokens_user_active_idx",
+            table_name="refresh_tokens",
+            postgresql_concurrently=True,
+        )
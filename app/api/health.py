@@ -4,13 +4,16 @@ Exposes liveness, readiness, and health endpoints used by orchestrators and
 monitoring systems.
 """
 
-from fastapi import APIRouter, status
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, status
 from fastapi.responses import JSONResponse
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
 from starlette.responses import Response
 
-from app.core.database import get_session_local
+from app.core.database import get_db
 from app.core.logging import logger
 
 router = APIRouter()
@@ -23,14 +26,10 @@ def liveness_probe() -> dict[str, str]:
 
 
 @router.get("/ready", tags=["Health"])
-def readiness_probe() -> Response:
+def readiness_probe(db: Annotated[Session, Depends(get_db)]) -> Response:
     """Readiness probe: returns 200 if DB is up, 503 if not."""
     try:
-        db = get_session_local()()
-        try:
-            db.execute(text("SELECT 1"))
-        finally:
-            db.close()
+        db.execute(text("SELECT 1"))
     except SQLAlchemyError as e:
         logger.error("Readiness check DB failure", error=str(e))
         return JSONResponse(
@@ -42,15 +41,11 @@ def readiness_probe() -> Response:
 
 
 @router.get("/health", tags=["Health"])
-def health_check() -> dict[str, str]:
+def health_check(db: Annotated[Session, Depends(get_db)]) -> dict[str, str]:
     """Detailed health check: returns app and DB status."""
     db_status = "ok"
     try:
-        db = get_session_local()()
-        try:
-            db.execute(text("SELECT 1"))
-        finally:
-            db.close()
+        db.execute(text("SELECT 1"))
     except SQLAlchemyError as e:
         db_status = "down"
         logger.error("Health check DB failure", error=str(e))
@@ -7,15 +7,18 @@ rotation and sliding expiration, and logout flows.
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, Request, Response, status
-from sqlalchemy.orm import Session
 
 from app.core.auth import get_current_user
 from app.core.config import settings
-from app.core.database import get_db
 from app.core.exceptions import InvalidCredentialsError, LogoutNoSessionError
 from app.core.logging import logger
 from app.core.request_utils import get_client_ip, get_user_agent
 from app.models.user import User
+from app.repositories.refresh_token_repository import (
+    RefreshTokenRepository,
+    get_refresh_token_repository,
+)
+from app.repositories.user_repository import UserRepository, get_user_repository
 from app.schemas.user import TokenResponse, UserLogin, UserRegister, UserResponse
 from app.services import user_service
 
@@ -106,18 +109,20 @@ def require_refresh_cookie_for_logout(request: Request) -> str:
 )
 def register(
     user: UserRegister,
-    db: Annotated[Session, Depends(get_db)],
+    user_repo: Annotated[UserRepository, Depends(get_user_repository)],
 ) -> UserResponse:
     """Register a new user.
 
     Args:
         user: Registration payload containing name, email and password.
-        db: Database session dependency.
+        user_repo: Request-scoped user repository dependency.
 
     Returns:
         The created user (id, name, email).
     """
-    new_user = user_service.register_user(user.name, user.email, user.password, db)
+    new_user = user_service.register_user(
+        user.name, user.email, user.password, user_repo
+    )
     logger.info("User registered", user_id=new_user.id, email=new_user.email)
     return UserResponse(id=new_user.id, name=new_user.name, email=new_user.email)
 
@@ -136,26 +141,31 @@ def register(
 def login(
     user: UserLogin,
     response: Response,
-    db: Annotated[Session, Depends(get_db)],
+    user_repo: Annotated[UserRepository, Depends(get_user_repository)],
+    token_repo: Annotated[
+        RefreshTokenRepository, Depends(get_refresh_token_repository)
+    ],
 ) -> TokenResponse:
     """Authenticate a user and set a refresh cookie.
 
     Args:
         user: Login payload with email and password.
         response: Response used to set the refresh token cookie.
-        db: Database session dependency.
+        user_repo: Request-scoped user repository dependency.
+        token_repo: Request-scoped refresh token repository dependency.
 
     Returns:
         A JWT access token response.
     """
-    access_token, refresh_token = user_service.authenticate_user(
+    tokens = user_service.authenticate_user(
         user.email,
         user.password,
-        db,
+        user_repo,
+        token_repo,
     )
     logger.info("User login", email=user.email)
-    _set_refresh_cookie(response, refresh_token)
-    return TokenResponse(access_token=access_token)
+    _set_refresh_cookie(response, tokens.refresh_token)
+    return TokenResponse(access_token=tokens.access_token)
 
 
 @router.post(
@@ -170,7 +180,10 @@ def login(
 def refresh_token(
     request: Request,
     response: Response,
-    db: Annotated[Session, Depends(get_db)],
+    user_repo: Annotated[UserRepository, Depends(get_user_repository)],
+    token_repo: Annotated[
+        RefreshTokenRepository, Depends(get_refresh_token_repository)
+    ],
     refresh_cookie: Annotated[str, Depends(require_refresh_cookie_for_refresh)],
 ) -> TokenResponse:
     """Refresh the access token using a valid refresh token.
@@ -180,15 +193,16 @@ def refresh_token(
     """
     user_agent = get_user_agent(request)
     ip_address = get_client_ip(request)
-    access_token, new_refresh_token = user_service.rotate_refresh_token(
+    tokens = user_service.rotate_refresh_token(
         refresh_cookie,
-        db,
+        token_repo,
+        user_repo,
         user_agent=user_agent,
         ip_address=ip_address,
     )
     logger.info("Refresh token rotated")
-    _set_refresh_cookie(response, new_refresh_token)
-    return TokenResponse(access_token=access_token)
+    _set_refresh_cookie(response, tokens.refresh_token)
+    return TokenResponse(access_token=tokens.access_token)
 
 
 @router.post(
@@ -203,7 +217,9 @@ def refresh_token(
 def logout(
     response: Response,
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    token_repo: Annotated[
+        RefreshTokenRepository, Depends(get_refresh_token_repository)
+    ],
     refresh_cookie: Annotated[str, Depends(require_refresh_cookie_for_logout)],
 ) -> None:
     """Logout the authenticated user and revoke their refresh token.
@@ -213,7 +229,7 @@ def logout(
     try:
         user_service.logout_single_session(
             current_user,
-            db,
+            token_repo,
             refresh_token=refresh_cookie,
         )
     except InvalidCredentialsError as exc:
@@ -244,10 +260,12 @@ def logout(
 def logout_all(
     response: Response,
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[Session, Depends(get_db)],
+    token_repo: Annotated[
+        RefreshTokenRepository, Depends(get_refresh_token_repository)
+    ],
 ) -> None:
     """Logout the user everywhere by revoking all refresh tokens."""
-    user_service.logout_all_sessions(current_user, db)
+    user_service.logout_all_sessions(current_user, token_repo)
     logger.info(
         "User logged out everywhere",
         user_id=current_user.id,
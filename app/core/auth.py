@@ -5,52 +5,89 @@ token creation, OAuth2 bearer dependency, and a Basic Auth guard used by the
 metrics endpoint.
 """
 
+import hashlib
+import os
 import secrets
+import threading
 from collections.abc import Callable, Mapping
 from datetime import UTC, datetime, timedelta
 from typing import Annotated
 
+import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBasic, HTTPBasicCredentials, OAuth2PasswordBearer
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from jose import JWTError, jwk, jwt
 
+from app.core.auth_cache import access_token_cache
 from app.core.config import settings
-from app.core.database import get_db
 from app.models.user import User
+from app.repositories.user_repository import UserRepository, get_user_repository
 
 SECRET_KEY: str = settings.SECRET_KEY
 ALGORITHM: str = "HS256"
+# Built once: given a raw secret, jose constructs a new key object on every
+# encode and decode.
+_JWT_KEY = jwk.construct(SECRET_KEY, ALGORITHM)
 # Use Argon2id for password hashing (memory-hard, OWASP-recommended).
-# Requires `argon2-cffi` dependency. Tuned for a good balance of security & speed.
-pwd_context = CryptContext(
-    schemes=["argon2"],
-    deprecated="auto",
-    argon2__time_cost=settings.ARGON2_TIME_COST,
-    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
-    argon2__parallelism=settings.ARGON2_PARALLELISM,
+# argon2-cffi binds the reference C implementation (libargon2) directly, without
+# a Passlib dispatch layer. Tuned for a good balance of security & speed.
+password_hasher = PasswordHasher(
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_COST,
+    parallelism=settings.ARGON2_PARALLELISM,
 )
+# Hash prefixes of legacy bcrypt hashes. These are still accepted on login and
+# flagged for upgrade so rehash-on-verify migrates them to Argon2id.
+_BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+# bcrypt only considers the first 72 bytes of the password.
+_BCRYPT_MAX_PASSWORD_BYTES = 72
+# Sync endpoints run on the AnyIO worker thread pool, which is far larger than the
+# number of cores. Cap the number of simultaneous hashes so a login burst queues
+# instead of oversubscribing the CPU and allocating ARGON2_MEMORY_COST per thread.
+_hash_slots = threading.BoundedSemaphore(
+    settings.ARGON2_MAX_CONCURRENCY or os.cpu_count() or 1
+)
+# Refresh tokens carry 256 bits of randomness (43 base64url characters); more
+# bytes only cost RNG draws and cookie size without adding meaningful security.
+REFRESH_TOKEN_NBYTES = 32
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/users/login")
 security = HTTPBasic()
 
 
 def hash_password(password: str) -> str:
     """Hash a plaintext password using Argon2id."""
-    return pwd_context.hash(password)
+    with _hash_slots:
+        return password_hasher.hash(password)
 
 
 def verify_password(plain: str, hashed: str) -> bool:
-    """Verify that a plaintext password matches a stored hash."""
-    return pwd_context.verify(plain, hashed)
+    """Verify that a plaintext password matches a stored hash.
+
+    Argon2id hashes are verified with argon2-cffi; legacy bcrypt hashes are
+    verified with the bcrypt library so they keep working until upgraded.
+    Raises ValueError if the stored hash format is not recognized.
+    """
+    with _hash_slots:
+        if hashed.startswith(_BCRYPT_PREFIXES):
+            secret = plain.encode()[:_BCRYPT_MAX_PASSWORD_BYTES]
+            return bcrypt.checkpw(secret, hashed.encode())
+        try:
+            return password_hasher.verify(hashed, plain)
+        except VerificationError:
+            return False
 
 
 def needs_rehash(hashed: str) -> bool:
     """Return True if the stored hash should be upgraded with current settings.
 
     Useful for transparent hash upgrades during login after tuning Argon2 parameters.
+    Legacy bcrypt hashes always need an upgrade to Argon2id.
     """
-    return pwd_context.needs_update(hashed)
+    if hashed.startswith(_BCRYPT_PREFIXES):
+        return True
+    return password_hasher.check_needs_rehash(hashed)
 
 
 def create_access_token(data: Mapping[str, object]) -> str:
@@ -66,40 +103,57 @@ def create_access_token(data: Mapping[str, object]) -> str:
     to_encode: dict[str, object] = dict(data)
     expire = datetime.now(UTC) + timedelta(minutes=settings.JWT_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return jwt.encode(to_encode, _JWT_KEY, algorithm=ALGORITHM)
 
 
 def create_refresh_token() -> tuple[str, datetime]:
     """Create an opaque refresh token and its expiration timestamp."""
     expire = datetime.now(UTC) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    token = secrets.token_urlsafe(64)
+    token = secrets.token_urlsafe(REFRESH_TOKEN_NBYTES)
     return token, expire
 
 
+def hash_refresh_token(token: str) -> bytes:
+    """Return the SHA-256 digest under which a refresh token is stored.
+
+    Refresh tokens are high-entropy random values, so a fast unsalted hash is
+    sufficient: it cannot be brute-forced, and lookups stay a single indexed
+    equality match on a fixed-width column.
+    """
+    return hashlib.sha256(token.encode()).digest()
+
+
 def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
-    db: Annotated[Session, Depends(get_db)],
+    user_repo: Annotated[UserRepository, Depends(get_user_repository)],
 ) -> User:
     """Retrieve the current user from the bearer token.
 
-    Decodes the JWT, extracts the subject (email), and fetches the user from
-    the database. Raises 401 if token is invalid or user not found.
+    Decodes the JWT, extracts the user id, and fetches the user from the
+    database. Recently verified tokens skip the decode via
+    ``access_token_cache``; the user is loaded either way. Raises 401 if token
+    is invalid or user not found.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Authentication required. Please log in or register.",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    uid = access_token_cache.get(token)
+    if uid is None:
+        try:
+            payload = jwt.decode(token, _JWT_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            raise credentials_exception from None
         uid_value = payload.get("uid")
         if not isinstance(uid_value, int):
             raise credentials_exception
-        uid: int = uid_value
-    except JWTError:
-        raise credentials_exception from None
-    user = db.query(User).filter(User.id == uid).first()
+        uid = uid_value
+        exp = payload.get("exp")
+        access_token_cache.put(token, uid, exp if isinstance(exp, int) else None)
+    user = user_repo.get_by_id(uid)
     if user is None:
+        access_token_cache.invalidate_user(uid)
         raise credentials_exception
     return user
 
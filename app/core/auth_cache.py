@@ -0,0 +1,132 @@
+"""In-process cache of verified access tokens.
+
+Every authenticated request decodes the bearer JWT and loads the user by id.
+Clients typically reuse one access token for many requests, so the user id a
+token was verified to carry is kept in a small LRU cache with a short TTL. A
+hit skips the signature check; the user row is still loaded through the
+session, so deleted users are rejected immediately and callers always get the
+ORM instance.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.core.config import settings
+
+
+@dataclass(slots=True, frozen=True)
+class _CachedToken:
+    """User id recorded for a verified access token."""
+
+    user_id: int
+    expires_at: float
+
+
+class AccessTokenCache:
+    """Thread-safe LRU + TTL cache mapping access tokens to user ids.
+
+    Entries expire after ``ttl_seconds`` or when the token itself expires,
+    whichever comes first. Keys are SHA-256 digests so raw bearer tokens are
+    not retained in memory. A TTL of zero disables caching.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: int) -> None:
+        """Create an empty cache.
+
+        Args:
+            maxsize: Maximum number of tokens kept before evicting the least
+                recently used entry.
+            ttl_seconds: Upper bound on how long a verified token is trusted
+                without re-checking its signature.
+        """
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[bytes, _CachedToken] = OrderedDict()
+        self._keys_by_user: dict[int, set[bytes]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> int | None:
+        """Return the user id for a cached token, or None on a miss."""
+        key = self._key(token)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= now:
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+        return entry.user_id
+
+    def put(self, token: str, user_id: int, token_exp: float | None = None) -> None:
+        """Cache the user id verified for ``token``.
+
+        Args:
+            token: The verified bearer token.
+            user_id: The token's ``uid`` claim.
+            token_exp: The token's ``exp`` claim (Unix time), if present.
+        """
+        if self.ttl_seconds <= 0 or self.maxsize <= 0:
+            return
+        lifetime = float(self.ttl_seconds)
+        if token_exp is not None:
+            lifetime = min(lifetime, token_exp - time.time())
+        if lifetime <= 0:
+            return
+        key = self._key(token)
+        entry = _CachedToken(
+            user_id=user_id,
+            expires_at=time.monotonic() + lifetime,
+        )
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = entry
+            self._keys_by_user.setdefault(entry.user_id, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached token belonging to ``user_id``."""
+        with self._lock:
+            for key in self._keys_by_user.pop(user_id, set()):
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def __len__(self) -> int:
+        """Return the number of cached tokens, including not-yet-pruned ones."""
+        return len(self._entries)
+
+    def _discard(self, key: bytes) -> None:
+        """Remove ``key`` and its user index entry. Caller must hold the lock."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_user.get(entry.user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry.user_id]
+
+
+access_token_cache = AccessTokenCache(
+    maxsize=settings.ACCESS_TOKEN_CACHE_MAXSIZE,
+    ttl_seconds=min(
+        settings.ACCESS_TOKEN_CACHE_TTL_SECONDS, settings.JWT_EXPIRE_MINUTES * 60
+    ),
+)
@@ -25,11 +25,16 @@ class Settings(BaseSettings):
     METRICS_USER: str = "metrics"
     METRICS_PASS: str = "metrics"
     JWT_EXPIRE_MINUTES: int = 5  # JWT expiration in minutes (default: 5)
+    # Verified access tokens are cached in-process for at most this many seconds
+    ACCESS_TOKEN_CACHE_TTL_SECONDS: int = 60
+    ACCESS_TOKEN_CACHE_MAXSIZE: int = 10_000
     REFRESH_TOKEN_EXPIRE_DAYS: int = 1
     REFRESH_TOKEN_MAX_LIFETIME_DAYS: int = 30
-    ARGON2_TIME_COST: int = 3
-    ARGON2_MEMORY_COST: int = 65536
-    ARGON2_PARALLELISM: int = 2
+    ARGON2_TIME_COST: int = 2
+    ARGON2_MEMORY_COST: int = 47104
+    ARGON2_PARALLELISM: int = 1
+    # Max concurrent password hashes per process; None means os.cpu_count().
+    ARGON2_MAX_CONCURRENCY: int | None = None
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
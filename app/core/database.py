@@ -5,6 +5,7 @@ Base, and a FastAPI dependency that yields a scoped Session.
 """
 
 from collections.abc import Generator
+from functools import cache
 
 from sqlalchemy import Engine, create_engine
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
@@ -12,13 +13,19 @@ from sqlalchemy.orm import Session, declarative_base, sessionmaker
 from app.core.config import settings
 
 
+@cache
 def get_engine() -> "Engine":
-    """Create and return a SQLAlchemy Engine bound to the configured URL."""
+    """Return the process-wide SQLAlchemy Engine bound to the configured URL.
+
+    Created on first use and reused afterwards, so requests share one
+    connection pool instead of opening a fresh connection each time.
+    """
     return create_engine(settings.database_url)
 
 
+@cache
 def get_session_local() -> sessionmaker[Session]:
-    """Return a configured sessionmaker bound to the application Engine."""
+    """Return the sessionmaker bound to the application Engine (created once)."""
     return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
 
 
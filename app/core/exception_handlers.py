@@ -32,6 +32,18 @@ _COOKIE_CLEAR_EXCS = (
 )
 
 
+def _render_error_body(content: dict[str, str]) -> bytes:
+    """Serialize an error payload exactly as ``JSONResponse`` would."""
+    return bytes(JSONResponse(content=content).body)
+
+
+# Bodies that never vary, serialized once at import instead of per response
+_INTERNAL_ERROR_BODY = _render_error_body(
+    {"detail": "Internal server error.", "code": "internal_error"}
+)
+_HTTP_ERROR_CODE_ONLY_BODY = _render_error_body({"code": "http_error"})
+
+
 def _get_path(request: Request) -> str:
     """Return the request URL string for logging, or "unknown" if absent."""
     return str(getattr(request, "url", "unknown"))
@@ -53,6 +65,13 @@ def _build_json_response(status_code: int, code: str, detail: str) -> JSONRespon
     )
 
 
+def _build_prerendered_json_response(status_code: int, body: bytes) -> Response:
+    """Create a JSON response from an already serialized body."""
+    return Response(
+        content=body, status_code=status_code, media_type="application/json"
+    )
+
+
 def _build_no_content_response() -> Response:
     """Create an empty 204 No Content response."""
     return Response(status_code=204)
@@ -182,8 +201,8 @@ async def http_exception_handler(request: Request, exc: Exception) -> Response:
                 exc.status_code, "http_error", str(exc.detail)
             )
         else:
-            response = JSONResponse(
-                status_code=exc.status_code, content={"code": "http_error"}
+            response = _build_prerendered_json_response(
+                exc.status_code, _HTTP_ERROR_CODE_ONLY_BODY
             )
         if exc.headers:
             response.headers.update(exc.headers)
@@ -194,7 +213,7 @@ async def http_exception_handler(request: Request, exc: Exception) -> Response:
         exc_type=type(exc).__name__,
         path=_get_path(request),
     )
-    return _build_json_response(500, "internal_error", "Internal server error.")
+    return _build_prerendered_json_response(500, _INTERNAL_ERROR_BODY)
 
 
 async def unhandled_exception_handler(request: Request, exc: Exception) -> Response:
@@ -214,4 +233,4 @@ async def unhandled_exception_handler(request: Request, exc: Exception) -> Respo
         exc_type=type(exc).__name__,
         path=_get_path(request),
     )
-    return _build_json_response(500, "internal_error", "Internal server error.")
+    return _build_prerendered_json_response(500, _INTERNAL_ERROR_BODY)
@@ -1,5 +1,10 @@
 """Structured logging setup and helpers."""
 
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
 import structlog
 
 from app.core.config import settings
@@ -29,6 +34,43 @@ structlog.configure(
 logger = structlog.get_logger()
 
 
+class _RootForwardingHandler(logging.Handler):
+    """Hand queued records to the root logger's handlers.
+
+    Runs on the listener thread, so the root handlers (and whatever they write
+    to) are configured in one place and picked up at emit time.
+    """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        logging.getLogger().handle(record)
+
+
+# Refresh token audit records go through a queue so the stream write happens on
+# a background thread instead of the request thread. The JSON is still rendered
+# by the caller, which keeps the record timestamp at the time of the event.
+audit_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+_audit_stdlib_logger = logging.getLogger("app.audit")
+_audit_stdlib_logger.addHandler(QueueHandler(audit_queue))
+_audit_stdlib_logger.propagate = False
+_audit_listener = QueueListener(audit_queue, _RootForwardingHandler())
+_audit_listener.start()
+atexit.register(_audit_listener.stop)
+
+audit_logger = structlog.get_logger("app.audit")
+
+
+def flush_audit_log() -> None:
+    """Block until every queued audit record has been handed to the handlers."""
+    _audit_listener.stop()
+    _audit_listener.start()
+
+
+# Tokens of at most this many characters are masked entirely
+_MASK_FULL_MAX_LEN = 8
+# Full masks for every short length, so masking one allocates nothing
+_FULL_MASKS = tuple("*" * n for n in range(_MASK_FULL_MAX_LEN + 1))
+
+
 def mask_token(token: object | None) -> str | None:
     """Return a short, non-sensitive fingerprint for a secret token.
 
@@ -36,15 +78,23 @@ def mask_token(token: object | None) -> str | None:
       - None -> None
       - "abcd1234" -> "********" (fully masked if very short)
       - "abcde12345" -> "abcd...2345"
+      - b"abcde12345" -> "abcd...2345" (bytes are decoded, not repr'd)
     """
     if token is None:
         return None
+    if isinstance(token, bytes | bytearray):
+        token = token.decode(errors="replace")
+    if isinstance(token, str):
+        # Fast path for the common case: no len() probing or str() coercion.
+        if len(token) <= _MASK_FULL_MAX_LEN:
+            return _FULL_MASKS[len(token)]
+        return f"{token[:4]}...{token[-4:]}"
     try:
         length = len(token)  # type: ignore[arg-type]
     except TypeError:
         return "***"
-    if length <= 8:
-        return "*" * length
+    if length <= _MASK_FULL_MAX_LEN:
+        return _FULL_MASKS[length]
     # token could be any object with __len__ and slicing; coerce to str for fingerprint
     token_str = str(token)
     return f"{token_str[:4]}...{token_str[-4:]}"
@@ -34,11 +34,13 @@ def get_client_ip(request: Request) -> str | None:
 
     Returns None if no candidate is available.
     """
-    xff = request.headers.get("x-forwarded-for")
+    headers = request.headers
+    xff = headers.get("x-forwarded-for")
     if xff:
-        first = xff.split(",")[0].strip()
+        # partition stops at the first comma instead of splitting every hop
+        first = xff.partition(",")[0].strip()
         if first:
             return first
     if request.client:
         return request.client.host
-    return request.headers.get("x-real-ip")
+    return headers.get("x-real-ip")
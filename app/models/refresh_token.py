@@ -9,7 +9,7 @@ if TYPE_CHECKING:  # pragma: no cover - typing only
 else:  # provide a runtime alias for annotations evaluated by SQLAlchemy
     dt = __import__("datetime")  # type: ignore[assignment]
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, String
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, LargeBinary, String, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -22,10 +22,23 @@ class RefreshToken(Base):
     """Refresh token entity with metadata for session management."""
 
     __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        # Partial index over active sessions only: logout-everywhere touches a
+        # user's unrevoked tokens, independent of historical token count.
+        Index(
+            "refresh_tokens_user_active_idx",
+            "user_id",
+            postgresql_where=text("revoked = false"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
-    token: Mapped[str] = mapped_column(String(512), unique=True, nullable=False)
+    # SHA-256 digest of the opaque token; the plaintext is only ever held by
+    # the client, so a database dump does not expose usable sessions.
+    token_hash: Mapped[bytes] = mapped_column(
+        LargeBinary(32), unique=True, nullable=False
+    )
     expires_at: Mapped[dt.datetime] = mapped_column(
         DateTime(timezone=True), nullable=False
     )
@@ -1,14 +1,41 @@
 """Repository for managing refresh token persistence and queries."""
 
+from dataclasses import dataclass
 from datetime import UTC, datetime
+from typing import Annotated
 
+from fastapi import Depends
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
+from app.core.auth import hash_refresh_token
+from app.core.database import get_db
 from app.models.refresh_token import RefreshToken
 
 
+@dataclass(slots=True, frozen=True)
+class RevokedRefreshToken:
+    """Column snapshot of a refresh token returned by an atomic revoke.
+
+    Plain values rather than an ORM instance: the revoke commits, and reading
+    attributes of an expired instance would issue another SELECT.
+    """
+
+    id: int
+    user_id: int
+    created_at: datetime
+    expires_at: datetime
+    user_agent: str | None
+    ip_address: str | None
+
+
 class RefreshTokenRepository:
-    """Data access methods for refresh tokens."""
+    """Data access methods for refresh tokens.
+
+    Methods take the plaintext token presented by the client and match it by
+    its SHA-256 digest; the plaintext itself is never persisted.
+    """
 
     def __init__(self: "RefreshTokenRepository", db: Session) -> None:
         """Initialize with a DB session."""
@@ -16,18 +43,91 @@ class RefreshTokenRepository:
 
     def revoke_token(self: "RefreshTokenRepository", token: str) -> None:
         """Mark a single refresh token as revoked."""
-        self.db.query(RefreshToken).filter(
-            RefreshToken.token == token,
-            ~RefreshToken.revoked,
-        ).update({"revoked": True})
+        self.db.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == hash_refresh_token(token),
+                ~RefreshToken.revoked,
+            )
+            .values(revoked=True)
+            .execution_options(synchronize_session=False)
+        )
         self.db.commit()
 
-    def revoke_all_tokens(self: "RefreshTokenRepository", user_id: int) -> None:
-        """Revoke all active refresh tokens for a user."""
-        self.db.query(RefreshToken).filter(
-            RefreshToken.user_id == user_id,
+    def revoke_and_return(
+        self: "RefreshTokenRepository",
+        token: str,
+        *,
+        user_id: int | None = None,
+        active_at: datetime | None = None,
+        commit: bool = True,
+    ) -> RevokedRefreshToken | None:
+        """Revoke a usable refresh token and return its row in one statement.
+
+        Runs ``UPDATE ... WHERE token_hash = :hash AND NOT revoked ... RETURNING``
+        so the check and the revoke happen atomically: of two concurrent
+        requests presenting the same token, only one gets a row back.
+
+        Args:
+            token: The refresh token value.
+            user_id: If given, only revoke the token when it belongs to this user.
+            active_at: If given, only revoke the token when it has not expired
+                at this instant.
+            commit: Commit immediately. Pass False to leave the revoke in the
+                open transaction so a following write (e.g. ``add_token``)
+                commits both at once.
+
+        Returns:
+            The revoked token's columns, or None if no usable token matched.
+        """
+        conditions = [
+            RefreshToken.token_hash == hash_refresh_token(token),
             ~RefreshToken.revoked,
-        ).update({"revoked": True})
+        ]
+        if user_id is not None:
+            conditions.append(RefreshToken.user_id == user_id)
+        if active_at is not None:
+            conditions.append(RefreshToken.expires_at >= active_at)
+        stmt = (
+            update(RefreshToken)
+            .where(*conditions)
+            .values(revoked=True)
+            .returning(
+                RefreshToken.id,
+                RefreshToken.user_id,
+                RefreshToken.created_at,
+                RefreshToken.expires_at,
+                RefreshToken.user_agent,
+                RefreshToken.ip_address,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        row = self.db.execute(stmt).one_or_none()
+        if commit:
+            self.db.commit()
+        if row is None:
+            return None
+        return RevokedRefreshToken(**row._asdict())
+
+    def revoke_all_tokens(self: "RefreshTokenRepository", user_id: int) -> None:
+        """Revoke all active refresh tokens for a user.
+
+        Runs as one set-based UPDATE without loading or synchronizing ORM rows;
+        the commit expires any instances already held by the session.
+
+        This is the only bulk revoke path. The ``NOT revoked`` filter must
+        stay: it keeps the work proportional to the user's active sessions, so
+        a client repeating logout-everywhere rewrites no rows (and generates no
+        WAL). It also matches the predicate of
+        ``refresh_tokens_user_active_idx``. Do not rewrite it as
+        ``revoked IS false``, which the planner cannot match to that index.
+        """
+        self.db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.user_id == user_id, ~RefreshToken.revoked)
+            .values(revoked=True)
+            .execution_options(synchronize_session=False)
+        )
         self.db.commit()
 
     def add_token(
@@ -37,22 +137,56 @@ class RefreshTokenRepository:
         expires_at: datetime,
         user_agent: str | None = None,
         ip_address: str | None = None,
-    ) -> None:
-        """Persist a new refresh token with metadata."""
+        *,
+        commit: bool = True,
+    ) -> bool:
+        """Persist a new refresh token with metadata.
+
+        Only the token's SHA-256 digest is stored. Issues a single
+        ``INSERT ... ON CONFLICT (token_hash) DO NOTHING`` and relies on the
+        UNIQUE(token_hash) constraint rather than a pre-insert lookup.
+
+        Args:
+            user_id: Owner of the token.
+            token: The refresh token value.
+            expires_at: Expiry; naive values are taken as UTC.
+            user_agent: Client user agent recorded with the session.
+            ip_address: Client IP recorded with the session.
+            commit: Commit after a successful insert. A conflicting insert
+                never commits, so writes already pending in the transaction
+                (e.g. a revoke from ``revoke_and_return(commit=False)``) are
+                only committed together with a new token.
+
+        Returns:
+            True if the token was inserted, False if the value already existed.
+        """
         # Ensure expires_at is offset-aware
         if expires_at.tzinfo is None:
             expires_at = expires_at.replace(tzinfo=UTC)
-        new_token = RefreshToken(
-            user_id=user_id,
-            token=token,
-            expires_at=expires_at,
-            revoked=False,
-            created_at=datetime.now(UTC),
-            user_agent=user_agent,
-            ip_address=ip_address,
+        stmt = (
+            insert(RefreshToken)
+            .values(
+                user_id=user_id,
+                token_hash=hash_refresh_token(token),
+                expires_at=expires_at,
+                revoked=False,
+                created_at=datetime.now(UTC),
+                user_agent=user_agent,
+                ip_address=ip_address,
+            )
+            .on_conflict_do_nothing(index_elements=[RefreshToken.token_hash])
+            .returning(RefreshToken.id)
         )
-        self.db.add(new_token)
-        self.db.commit()
+        inserted_id = self.db.execute(stmt).scalar_one_or_none()
+        if inserted_id is None:
+            return False
+        if commit:
+            self.db.commit()
+        return True
+
+    def rollback(self: "RefreshTokenRepository") -> None:
+        """Discard writes pending in the current transaction."""
+        self.db.rollback()
 
     def get_valid_token(
         self: "RefreshTokenRepository",
@@ -61,7 +195,21 @@ class RefreshTokenRepository:
         """Return a non-revoked token by value, or None if not found."""
         return (
             self.db.query(RefreshToken)
-            .filter(RefreshToken.token == token, ~RefreshToken.revoked)
+            .filter(
+                RefreshToken.token_hash == hash_refresh_token(token),
+                ~RefreshToken.revoked,
+            )
+            .first()
+        )
+
+    def get_token(
+        self: "RefreshTokenRepository",
+        token: str,
+    ) -> RefreshToken | None:
+        """Return a token by value regardless of its revoked/expiry state."""
+        return (
+            self.db.query(RefreshToken)
+            .filter(RefreshToken.token_hash == hash_refresh_token(token))
             .first()
         )
 
@@ -75,3 +223,10 @@ class RefreshTokenRepository:
             .filter(RefreshToken.user_id == user_id, ~RefreshToken.revoked)
             .all()
         )
+
+
+def get_refresh_token_repository(
+    db: Annotated[Session, Depends(get_db)],
+) -> RefreshTokenRepository:
+    """Return a request-scoped ``RefreshTokenRepository`` (cached by FastAPI)."""
+    return RefreshTokenRepository(db)
@@ -1,7 +1,13 @@
 """User repository for database operations."""
 
+from typing import Annotated
+
+from fastapi import Depends
 from sqlalchemy.orm import Session
 
+from app.core.auth_cache import access_token_cache
+from app.core.database import get_db
+from app.models.refresh_token import RefreshToken
 from app.models.user import User
 
 
@@ -19,13 +25,17 @@ class UserRepository:
     def get_by_id(self: "UserRepository", user_id: int) -> User | None:
         """Return a user by primary key.
 
+        Uses ``Session.get`` so a user already loaded in this session (e.g. by
+        ``get_by_email`` earlier in the same request) is served from the
+        identity map without another SELECT.
+
         Args:
             user_id: The user's ID.
 
         Returns:
             The matching ``User`` or ``None`` if not found.
         """
-        return self.db.query(User).filter(User.id == user_id).first()
+        return self.db.get(User, user_id)
 
     def get_by_email(self: "UserRepository", email: str) -> User | None:
         """Return a user by unique email address, if present.
@@ -65,6 +75,9 @@ class UserRepository:
     ) -> None:
         """Update the stored password hash for a user.
 
+        Cached access tokens for the user are dropped so the next request
+        re-verifies its token.
+
         Args:
             user_id: The user's ID.
             new_hashed_password: The new password hash to store.
@@ -75,3 +88,39 @@ class UserRepository:
         user.hashed_password = new_hashed_password
         self.db.add(user)
         self.db.commit()
+        access_token_cache.invalidate_user(user_id)
+
+    def delete(self: "UserRepository", user_id: int) -> bool:
+        """Delete a user together with their refresh tokens.
+
+        Cached access tokens for the user are dropped as well.
+
+        Args:
+            user_id: The user's ID.
+
+        Returns:
+            True if a user was deleted, False if none matched.
+        """
+        user = self.get_by_id(user_id)
+        if user is None:
+            return False
+        self.db.query(RefreshToken).filter(RefreshToken.user_id == user_id).delete()
+        self.db.delete(user)
+        self.db.commit()
+        access_token_cache.invalidate_user(user_id)
+        return True
+
+
+def get_user_repository(db: Annotated[Session, Depends(get_db)]) -> UserRepository:
+    """Return a ``UserRepository`` bound to the request's DB session.
+
+    FastAPI caches dependency results per request, so every consumer in the
+    same request shares one repository instance.
+
+    Args:
+        db: Database session dependency.
+
+    Returns:
+        The request-scoped ``UserRepository``.
+    """
+    return UserRepository(db)
@@ -2,18 +2,22 @@
 
 from __future__ import annotations
 
+import logging
+from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
 from secrets import token_urlsafe
-from typing import TYPE_CHECKING, cast
+from typing import TYPE_CHECKING, NoReturn
 
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.core.auth import (
+    REFRESH_TOKEN_NBYTES,
     create_access_token,
     hash_password,
     needs_rehash,
     verify_password,
 )
+from app.core.auth_cache import access_token_cache
 from app.core.config import settings
 from app.core.exceptions import (
     EmailAlreadyRegisteredError,
@@ -21,23 +25,39 @@ from app.core.exceptions import (
     LogoutNoSessionError,
     LogoutOperationError,
 )
-from app.core.logging import logger, mask_token
-from app.repositories.refresh_token_repository import RefreshTokenRepository
-from app.repositories.user_repository import UserRepository
+from app.core.logging import audit_logger, logger, mask_token
 
 if TYPE_CHECKING:  # pragma: no cover - types only
-    from sqlalchemy.orm import Session
-
     from app.models.refresh_token import RefreshToken
     from app.models.user import User
+    from app.repositories.refresh_token_repository import (
+        RefreshTokenRepository,
+        RevokedRefreshToken,
+    )
+    from app.repositories.user_repository import UserRepository
+
+# Bound on refresh token generation retries after a UNIQUE(token) collision
+_REFRESH_TOKEN_INSERT_ATTEMPTS = 3
+# Level at which refresh token audit records are emitted
+_AUDIT_LOG_LEVEL = logging.INFO
+# Verified against when the email is unknown so that a failed lookup costs the
+# same Argon2 work as a wrong password and does not reveal which emails exist.
+_DUMMY_PASSWORD_HASH = hash_password("dummy-password")
+
 
+@dataclass(slots=True, frozen=True)
+class TokenPair:
+    """Access and refresh tokens issued by a login or a refresh rotation."""
 
-def register_user(name: str, email: str, password: str, db: Session) -> User:
+    access_token: str
+    refresh_token: str
+
+
+def register_user(name: str, email: str, password: str, repo: UserRepository) -> User:
     """Register a new user and return the created ORM object.
 
     Raises EmailAlreadyRegisteredError if the email already exists.
     """
-    repo = UserRepository(db)
     existing = repo.get_by_email(email)
     if existing:
         logger.warning("Registration failed: email already registered", email=email)
@@ -61,18 +81,19 @@ def issue_access_token(user: User) -> str:
 def authenticate_user(
     email: str,
     password: str,
-    db: Session,
+    repo: UserRepository,
+    token_repo: RefreshTokenRepository,
     user_agent: str | None = None,
     ip_address: str | None = None,
-) -> tuple[str, str]:
-    """Authenticate a user and return access and refresh tokens.
+) -> TokenPair:
+    """Authenticate a user and return a new access/refresh ``TokenPair``.
 
     Raises InvalidCredentialsError if login fails.
     """
-    repo = UserRepository(db)
-    token_repo = RefreshTokenRepository(db)
     db_user = repo.get_by_email(email)
-    if not db_user or not verify_password(password, db_user.hashed_password):
+    if db_user is None:
+        verify_password(password, _DUMMY_PASSWORD_HASH)
+    if db_user is None or not verify_password(password, db_user.hashed_password):
         logger.warning("Authentication failed", email=email)
         msg = "Email or password incorrect."
         raise InvalidCredentialsError(msg)
@@ -86,19 +107,26 @@ def authenticate_user(
     )
 
 
-def logout_single_session(current_user: User, db: Session, refresh_token: str) -> None:
-    """Revoke the current session's refresh token only."""
-    token_repo = RefreshTokenRepository(db)
-    token_obj = _fetch_token_or_raise_logout_error(
-        token_repo, current_user, refresh_token
+def logout_single_session(
+    current_user: User, token_repo: RefreshTokenRepository, refresh_token: str
+) -> None:
+    """Revoke the current session's refresh token only.
+
+    The ownership/revoked checks and the revoke run as one atomic statement;
+    the token is only re-read to classify a failed logout for auditing.
+    """
+    access_token_cache.invalidate_user(current_user.id)
+    masked_token = mask_token(refresh_token)
+    revoked = _revoke_token_with_logging(
+        token_repo, current_user, refresh_token, masked_token
     )
-    _validate_logout_token_owner(current_user, token_obj, refresh_token)
-    _revoke_token_with_logging(token_repo, current_user, refresh_token)
+    if not revoked:
+        _raise_logout_no_session(token_repo, current_user, refresh_token, masked_token)
 
 
-def logout_all_sessions(current_user: User, db: Session) -> None:
+def logout_all_sessions(current_user: User, token_repo: RefreshTokenRepository) -> None:
     """Revoke all refresh tokens for the user (logout everywhere)."""
-    token_repo = RefreshTokenRepository(db)
+    access_token_cache.invalidate_user(current_user.id)
     token_repo.revoke_all_tokens(current_user.id)
     logger.info(
         "All refresh tokens revoked (logout everywhere)",
@@ -109,80 +137,101 @@ def logout_all_sessions(current_user: User, db: Session) -> None:
 
 def rotate_refresh_token(
     old_refresh_token: str,
-    db: Session,
+    token_repo: RefreshTokenRepository,
+    user_repo: UserRepository,
     user_agent: str | None = None,
     ip_address: str | None = None,
-) -> tuple[str, str]:
-    """Rotate a refresh token and issue a new access token and refresh token."""
-    token_repo = RefreshTokenRepository(db)
-    token_obj = token_repo.get_valid_token(old_refresh_token)
+) -> TokenPair:
+    """Rotate a refresh token and issue a new access token and refresh token.
+
+    The old token is checked and revoked by a single ``UPDATE ... RETURNING``,
+    so two concurrent rotations of the same token cannot both succeed. Audit
+    events produced by a rotation (anomalies, rotate, create) are
+    buffered and emitted as a single log record once the rotation finishes,
+    including when it fails part-way through. The rotate and create events
+    are only recorded once the replacement token (and with it the revoke) is
+    committed.
+    """
     now = datetime.now(UTC)
-    _validate_refresh_token(token_obj, old_refresh_token, now)
-    # token_obj is validated to be not None by _validate_refresh_token
-    token_typed = cast("RefreshToken", token_obj)
-    _detect_anomalies(token_typed, old_refresh_token, user_agent, ip_address)
-    _revoke_old_token_and_log_rotate(
-        token_repo, token_typed, old_refresh_token, user_agent, ip_address
-    )
-    user_id = token_typed.user_id
-    user_repo = UserRepository(db)
-    db_user = _get_user_or_raise(user_repo, user_id, old_refresh_token)
-    access_token = issue_access_token(db_user)
-    # Sliding expiration: extend expiry on rotation, but never exceed max lifetime
-    new_expiry = _compute_sliding_refresh_expiry(
-        created_at=token_typed.created_at, now=now
-    )
-    new_refresh_token = _create_refresh_token(
-        token_repo,
-        user_id,
-        new_expiry,
-        user_agent,
-        ip_address,
-    )
-    logger.info(
-        "Refresh token rotated (sliding expiration)",
-        user_id=user_id,
-        new_expiry=new_expiry.isoformat(),
-    )
-    _log_refresh_token_event(
-        event_type="create",
-        user_id=user_id,
-        token=mask_token(new_refresh_token),
-        user_agent=user_agent,
-        ip_address=ip_address,
-        details={"expires_at": new_expiry.isoformat()},
+    masked_old = mask_token(old_refresh_token)
+    # The revoke stays uncommitted until the replacement token is inserted, so
+    # a rotation costs one commit, and a rotation that fails part-way leaves
+    # the old token usable for a retry.
+    token_row = token_repo.revoke_and_return(
+        old_refresh_token, active_at=now, commit=False
     )
-    return access_token, new_refresh_token
+    if token_row is None:
+        _raise_unusable_refresh_token(
+            token_repo.get_token(old_refresh_token), masked_old, now
+        )
+    events: list[dict[str, object]] = []
+    try:
+        _detect_anomalies(token_row, masked_old, events, user_agent, ip_address)
+        user_id = token_row.user_id
+        db_user = _get_user_or_raise(user_repo, user_id, masked_old, events)
+        access_token = issue_access_token(db_user)
+        # Sliding expiration: extend expiry on rotation, but never exceed max lifetime
+        new_expiry = _compute_sliding_refresh_expiry(
+            created_at=token_row.created_at, now=now
+        )
+        new_refresh_token = _create_refresh_token(
+            token_repo,
+            user_id,
+            new_expiry,
+            user_agent,
+            ip_address,
+        )
+        # Only now is the revoke committed; a rotation that failed before this
+        # point was rolled back and must not be audited as one.
+        _append_rotate_event(token_row, masked_old, events, user_agent, ip_address)
+        logger.info(
+            "Refresh token rotated (sliding expiration)",
+            user_id=user_id,
+            new_expiry=new_expiry.isoformat(),
+        )
+        events.append(
+            _build_refresh_token_event(
+                event_type="create",
+                user_id=user_id,
+                masked_token=mask_token(new_refresh_token),
+                user_agent=user_agent,
+                ip_address=ip_address,
+                details={"expires_at": new_expiry.isoformat()},
+            )
+        )
+    finally:
+        _log_refresh_token_events(events)
+    return TokenPair(access_token, new_refresh_token)
 
 
-def _revoke_old_token_and_log_rotate(
-    token_repo: RefreshTokenRepository,
-    token_obj: RefreshToken,
-    old_refresh_token: str,
+def _append_rotate_event(
+    token_row: RevokedRefreshToken,
+    masked_old: str | None,
+    events: list[dict[str, object]],
     user_agent: str | None,
     ip_address: str | None,
 ) -> None:
-    """Revoke the old refresh token and log a rotation event.
-
-    This encapsulates the single-use revocation semantics and uniform logging.
-    """
-    # Revoke old token (single-use)
-    token_repo.revoke_token(old_refresh_token)
-    _log_refresh_token_event(
-        event_type="rotate",
-        user_id=token_obj.user_id,
-        token=mask_token(old_refresh_token),
-        user_agent=user_agent,
-        ip_address=ip_address,
+    """Buffer the audit event for a refresh token revoked by rotation."""
+    events.append(
+        _build_refresh_token_event(
+            event_type="rotate",
+            user_id=token_row.user_id,
+            masked_token=masked_old,
+            user_agent=user_agent,
+            ip_address=ip_address,
+        )
     )
 
 
 def _get_user_or_raise(
-    user_repo: UserRepository, user_id: int, old_refresh_token: str
+    user_repo: UserRepository,
+    user_id: int,
+    masked_token: str | None,
+    events: list[dict[str, object]],
 ) -> User:
     """Fetch user by id or raise InvalidCredentialsError with logging.
 
-    Logs a suspicious event if the user is missing for a valid refresh token.
+    Buffers a suspicious event if the user is missing for a valid refresh token.
     """
     db_user = user_repo.get_by_id(user_id)
     if db_user:
@@ -191,11 +240,13 @@ def _get_user_or_raise(
         "Suspicious activity: user not found for refresh token",
         user_id=user_id,
     )
-    _log_refresh_token_event(
-        event_type="suspicious",
-        user_id=user_id,
-        token=mask_token(old_refresh_token),
-        details={"reason": "user not found for refresh token"},
+    events.append(
+        _build_refresh_token_event(
+            event_type="suspicious",
+            user_id=user_id,
+            masked_token=masked_token,
+            details={"reason": "user not found for refresh token"},
+        )
     )
     msg = "User not found"
     raise InvalidCredentialsError(msg)
@@ -214,30 +265,67 @@ def _compute_sliding_refresh_expiry(*, created_at: datetime, now: datetime) -> d
     return min(requested_expiry, max_expiry)
 
 
-def _log_refresh_token_event(
+def _build_refresh_token_event(
     event_type: str,
     user_id: int | None = None,
-    token: str | None = None,
+    masked_token: str | None = None,
     user_agent: str | None = None,
     ip_address: str | None = None,
     details: dict[str, object] | None = None,
-) -> None:
-    """Log refresh token events for auditing and security.
+) -> dict[str, object]:
+    """Build a refresh token audit entry.
 
     Args describe the event fields: event_type (e.g., create/rotate/revoke),
-    user_id, token, user_agent, ip_address, and optional details.
+    user_id, masked_token (already passed through ``mask_token`` by the caller
+    so each flow masks a token once), user_agent, ip_address, and optional
+    details. Entries carry no timestamp of their own: the log record they are
+    emitted in is stamped by structlog's ``TimeStamper``.
     """
-    log_entry = {
-        "timestamp": datetime.now(UTC).isoformat(),
+    return {
         "event_type": event_type,
         "user_id": user_id,
-        "token": mask_token(token),
+        "token": masked_token,
         "user_agent": user_agent,
         "ip_address": ip_address,
         "details": details or {},
     }
-    # Example: log to file or stdout
-    logger.info(f"RefreshTokenAudit: {log_entry}")
+
+
+def _log_refresh_token_event(
+    event_type: str,
+    user_id: int | None = None,
+    masked_token: str | None = None,
+    user_agent: str | None = None,
+    ip_address: str | None = None,
+    details: dict[str, object] | None = None,
+) -> None:
+    """Log a single refresh token event for auditing and security.
+
+    Skips building the entry entirely when audit records would be filtered out.
+    """
+    if not audit_logger.is_enabled_for(_AUDIT_LOG_LEVEL):
+        return
+    log_entry = _build_refresh_token_event(
+        event_type=event_type,
+        user_id=user_id,
+        masked_token=masked_token,
+        user_agent=user_agent,
+        ip_address=ip_address,
+        details=details,
+    )
+    _log_refresh_token_events([log_entry])
+
+
+def _log_refresh_token_events(events: list[dict[str, object]]) -> None:
+    """Emit refresh token audit entries as one structured log record.
+
+    Entries are passed as structured fields so the JSON renderer serializes
+    them directly, keeping audit records machine-parseable. The record is
+    queued and written by the audit listener thread. Does nothing when no
+    events were buffered.
+    """
+    if events:
+        audit_logger.log(_AUDIT_LOG_LEVEL, "RefreshTokenAudit", events=events)
 
 
 # Private helper functions (ordered by first usage in public APIs)
@@ -268,7 +356,7 @@ def _build_successful_auth_response(
     email: str,
     user_agent: str | None,
     ip_address: str | None,
-) -> tuple[str, str]:
+) -> TokenPair:
     """Issue access + refresh tokens and emit logs consistently."""
     access_token = issue_access_token(user)
     expires_at = datetime.now(UTC) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
@@ -287,25 +375,49 @@ def _build_successful_auth_response(
     _log_refresh_token_event(
         event_type="create",
         user_id=user.id,
-        token=refresh_token,
+        masked_token=mask_token(refresh_token),
         user_agent=user_agent,
         ip_address=ip_address,
         details={"expires_at": expires_at.isoformat()},
     )
-    return access_token, refresh_token
+    return TokenPair(access_token, refresh_token)
+
+
+def _raise_logout_no_session(
+    token_repo: RefreshTokenRepository,
+    current_user: User,
+    refresh_token: str,
+    masked_token: str | None,
+) -> NoReturn:
+    """Audit why logout found no revocable session and raise.
+
+    Only runs after the atomic revoke matched no row; the token is re-read to
+    tell an unknown token from a revoked one or one owned by another user.
+    """
+    token_obj = _fetch_token_or_raise_logout_error(
+        token_repo, current_user, refresh_token, masked_token
+    )
+    _validate_logout_token_owner(current_user, token_obj, masked_token)
+    # The token was usable on re-read, so a concurrent request changed it
+    # between the revoke and the lookup; report it like any stale session.
+    msg = "No active session or already logged out."
+    raise LogoutNoSessionError(msg)
 
 
 def _fetch_token_or_raise_logout_error(
-    token_repo: RefreshTokenRepository, current_user: User, refresh_token: str
-) -> RefreshToken | None:
-    """Fetch valid token for logout, mapping DB errors to API errors."""
+    token_repo: RefreshTokenRepository,
+    current_user: User,
+    refresh_token: str,
+    masked_token: str | None,
+) -> RefreshToken:
+    """Fetch the token for logout, mapping DB errors to API errors."""
     try:
-        token_obj = token_repo.get_valid_token(refresh_token)
+        token_obj = token_repo.get_token(refresh_token)
     except SQLAlchemyError as exc:
         logger.exception(
             "Logout DB error while fetching token",
             user_id=getattr(current_user, "id", None),
-            token=mask_token(refresh_token),
+            token=masked_token,
             error=str(exc),
         )
         msg = "Logout operation failed."
@@ -314,12 +426,12 @@ def _fetch_token_or_raise_logout_error(
         logger.warning(
             "Suspicious activity: invalid or revoked refresh token used for logout",
             user_id=getattr(current_user, "id", None),
-            token=mask_token(refresh_token),
+            token=masked_token,
         )
         _log_refresh_token_event(
             event_type="suspicious",
             user_id=getattr(current_user, "id", None),
-            token=mask_token(refresh_token),
+            masked_token=masked_token,
             details={"reason": "invalid or revoked token used for logout"},
         )
         msg = "No active session or already logged out."
@@ -328,19 +440,19 @@ def _fetch_token_or_raise_logout_error(
 
 
 def _validate_logout_token_owner(
-    current_user: User, token_obj: RefreshToken, refresh_token: str
+    current_user: User, token_obj: RefreshToken, masked_token: str | None
 ) -> None:
     """Validate token belongs to user and isn't revoked; raise on mismatch."""
     if token_obj.user_id != current_user.id:
         logger.warning(
             "Suspicious activity: refresh token user mismatch on logout",
             user_id=getattr(current_user, "id", None),
-            token=mask_token(refresh_token),
+            token=masked_token,
         )
         _log_refresh_token_event(
             event_type="suspicious",
             user_id=getattr(current_user, "id", None),
-            token=mask_token(refresh_token),
+            masked_token=masked_token,
             details={"reason": "refresh token user mismatch on logout"},
         )
         msg = "No active session or already logged out."
@@ -349,12 +461,12 @@ def _validate_logout_token_owner(
         logger.warning(
             "Suspicious activity: revoked refresh token used for logout",
             user_id=current_user.id,
-            token=mask_token(refresh_token),
+            token=masked_token,
         )
         _log_refresh_token_event(
             event_type="suspicious",
             user_id=current_user.id,
-            token=mask_token(refresh_token),
+            masked_token=masked_token,
             details={"reason": "revoked token used for logout"},
         )
         msg = "No active session or already logged out."
@@ -362,86 +474,84 @@ def _validate_logout_token_owner(
 
 
 def _revoke_token_with_logging(
-    token_repo: RefreshTokenRepository, current_user: User, refresh_token: str
-) -> None:
-    """Revoke token with error mapping and structured logging."""
+    token_repo: RefreshTokenRepository,
+    current_user: User,
+    refresh_token: str,
+    masked_token: str | None,
+) -> bool:
+    """Revoke the user's active token with error mapping and structured logging.
+
+    Returns:
+        True if the token was revoked, False if no active token of the user
+        matched.
+    """
     try:
-        token_repo.revoke_token(refresh_token)
+        revoked = token_repo.revoke_and_return(refresh_token, user_id=current_user.id)
     except SQLAlchemyError as exc:
         logger.exception(
             "Logout DB error while revoking token",
             user_id=current_user.id,
-            token=mask_token(refresh_token),
+            token=masked_token,
             error=str(exc),
         )
         msg = "Logout operation failed."
         raise LogoutOperationError(msg) from exc
+    if revoked is None:
+        return False
     logger.info(
         "Refresh token revoked on logout",
         user_id=current_user.id,
-        token=mask_token(refresh_token),
+        token=masked_token,
     )
     _log_refresh_token_event(
         event_type="revoke",
         user_id=current_user.id,
-        token=refresh_token,
+        masked_token=masked_token,
     )
+    return True
 
 
 # Helper functions for token validation and anomaly detection
-def _validate_refresh_token(
-    token_obj: RefreshToken | None, token: str, now: datetime
-) -> None:
-    """Validate refresh token object and raise if invalid/expired/revoked."""
-    if not token_obj:
-        logger.warning(
-            "Suspicious activity: invalid or revoked refresh token used for rotation",
-            token=mask_token(token),
-        )
-        _log_refresh_token_event(
-            event_type="suspicious",
-            token=mask_token(token),
-            details={"reason": "invalid or revoked token used for rotation"},
-        )
-        msg = "Invalid or expired refresh token"
-        raise InvalidCredentialsError(msg)
-    if token_obj.revoked:
-        logger.warning(
-            "Suspicious activity: revoked refresh token used for rotation",
-            user_id=token_obj.user_id,
-            token=mask_token(token),
-        )
-        _log_refresh_token_event(
-            event_type="suspicious",
-            user_id=token_obj.user_id,
-            token=mask_token(token),
-            details={"reason": "revoked token used for rotation"},
-        )
-        msg = "Invalid or expired refresh token"
-        raise InvalidCredentialsError(msg)
-    if token_obj.expires_at < now:
-        logger.warning(
-            "Suspicious activity: expired refresh token used for rotation",
-            user_id=token_obj.user_id,
-            token=mask_token(token),
-        )
-        _log_refresh_token_event(
-            event_type="suspicious",
-            user_id=token_obj.user_id,
-            token=mask_token(token),
-            details={"reason": "expired token used for rotation"},
-        )
-        msg = "Invalid or expired refresh token"
-        raise InvalidCredentialsError(msg)
+def _raise_unusable_refresh_token(
+    token_obj: RefreshToken | None, masked_token: str | None, now: datetime
+) -> NoReturn:
+    """Audit why a refresh token could not be rotated and raise.
+
+    Only runs after the atomic revoke matched no row. ``token_obj`` is the
+    token looked up regardless of state and is used to classify the failure
+    as invalid, revoked or expired.
+    """
+    user_id = None
+    state = "invalid or revoked"
+    if token_obj is not None:
+        user_id = token_obj.user_id
+        if token_obj.revoked:
+            state = "revoked"
+        elif token_obj.expires_at < now:
+            state = "expired"
+    message = f"Suspicious activity: {state} refresh token used for rotation"
+    logger.warning(message, user_id=user_id, token=masked_token)
+    _log_refresh_token_event(
+        event_type="suspicious",
+        user_id=user_id,
+        masked_token=masked_token,
+        details={"reason": f"{state} token used for rotation"},
+    )
+    msg = "Invalid or expired refresh token"
+    raise InvalidCredentialsError(msg)
 
 
 def _detect_anomalies(
-    token_obj: RefreshToken,
-    token: str,
+    token_obj: RevokedRefreshToken,
+    masked_token: str | None,
+    events: list[dict[str, object]],
     user_agent: str | None = None,
     ip_address: str | None = None,
 ) -> None:
-    """Detect anomalies comparing provided metadata with stored values."""
+    """Detect anomalies comparing provided metadata with stored values.
+
+    Anomaly audit entries are appended to ``events`` for deferred emission.
+    """
     if user_agent and token_obj.user_agent and user_agent != token_obj.user_agent:
         logger.warning(
             "Suspicious activity: user agent anomaly detected during refresh",
@@ -449,16 +559,18 @@ def _detect_anomalies(
             expected=token_obj.user_agent,
             actual=user_agent,
         )
-        _log_refresh_token_event(
-            event_type="anomaly",
-            user_id=token_obj.user_id,
-            token=mask_token(token),
-            user_agent=user_agent,
-            ip_address=ip_address,
-            details={
-                "expected_user_agent": token_obj.user_agent,
-                "actual_user_agent": user_agent,
-            },
+        events.append(
+            _build_refresh_token_event(
+                event_type="anomaly",
+                user_id=token_obj.user_id,
+                masked_token=masked_token,
+                user_agent=user_agent,
+                ip_address=ip_address,
+                details={
+                    "expected_user_agent": token_obj.user_agent,
+                    "actual_user_agent": user_agent,
+                },
+            )
         )
     if ip_address and token_obj.ip_address and ip_address != token_obj.ip_address:
         logger.warning(
@@ -467,16 +579,18 @@ def _detect_anomalies(
             expected=token_obj.ip_address,
             actual=ip_address,
         )
-        _log_refresh_token_event(
-            event_type="anomaly",
-            user_id=token_obj.user_id,
-            token=mask_token(token),
-            user_agent=user_agent,
-            ip_address=ip_address,
-            details={
-                "expected_ip_address": token_obj.ip_address,
-                "actual_ip_address": ip_address,
-            },
+        events.append(
+            _build_refresh_token_event(
+                event_type="anomaly",
+                user_id=token_obj.user_id,
+                masked_token=masked_token,
+                user_agent=user_agent,
+                ip_address=ip_address,
+                details={
+                    "expected_ip_address": token_obj.ip_address,
+                    "actual_ip_address": ip_address,
+                },
+            )
         )
 
 
@@ -487,13 +601,23 @@ def _create_refresh_token(
     user_agent: str | None,
     ip_address: str | None,
 ) -> str:
-    """Create and persist a new refresh token and return its value."""
-    new_refresh_token = token_urlsafe(64)
-    token_repo.add_token(
-        user_id,
-        new_refresh_token,
-        expiry,
-        user_agent=user_agent,
-        ip_address=ip_address,
-    )
-    return new_refresh_token
+    """Create and persist a new refresh token and return its value.
+
+    A new value is generated only if the insert hits an existing token, which
+    is astronomically unlikely given the token's entropy. If every attempt
+    conflicts, the transaction is rolled back so that a revoke left pending by
+    a rotation is not committed without its replacement.
+    """
+    for _ in range(_REFRESH_TOKEN_INSERT_ATTEMPTS):
+        new_refresh_token = token_urlsafe(REFRESH_TOKEN_NBYTES)
+        if token_repo.add_token(
+            user_id,
+            new_refresh_token,
+            expiry,
+            user_agent=user_agent,
+            ip_address=ip_address,
+        ):
+            return new_refresh_token
+    token_repo.rollback()
+    msg = "Could not generate a unique refresh token."
+    raise RuntimeError(msg)
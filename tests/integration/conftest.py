@@ -1,38 +1,86 @@
-from collections.abc import Callable, Generator
-from typing import Any
+import os
+from collections.abc import AsyncGenerator, Callable, Generator
+from typing import Any, Final
 
+import httpx
 import pytest
+import pytest_asyncio
 from alembic.config import Config
+from argon2 import PasswordHasher, profiles
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine, make_url
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.orm import Session
 from testcontainers.postgres import PostgresContainer
 
 from alembic import command
+from app.core import auth
+from app.core.auth import hash_password
+from app.core.auth_cache import access_token_cache
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_db, get_engine, get_session_local
 from app.main import app
+from app.models.user import User
+from app.services import user_service
+from app.services.user_service import issue_access_token
 from tests.utils import PasswordKind, build_password
 
+# Durability is irrelevant for a throwaway test server: skipping fsync and
+# full-page writes makes the migration run and every committed test write
+# noticeably cheaper.
+POSTGRES_TEST_COMMAND = (
+    "postgres -c fsync=off -c synchronous_commit=off -c full_page_writes=off"
+)
+# Migrated once per server; every pytest worker clones its database from it.
+TEMPLATE_DATABASE = "chat_api_template"
+# Arbitrary application-chosen key for pg_advisory_lock around template setup
+TEMPLATE_LOCK_KEY = 7_365_001
+# Default registrant; tests treat it as read-only.
+USER_DATA: Final[dict[str, str]] = {
+    "name": "Test User",
+    "email": "testuser@example.com",
+    "password": build_password(PasswordKind.VALID),
+}
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _fast_password_hasher() -> Generator[None]:
+    """Hash passwords with the cheapest Argon2id parameters during the session.
+
+    Hashing cost is not under test here, and at production parameters every
+    register and login pays for a full Argon2 run. Hashes stay real Argon2id
+    so verification and rehash checks behave as in production.
+    """
+    hasher = PasswordHasher.from_parameters(profiles.CHEAPEST)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(auth, "password_hasher", hasher)
+        mp.setattr(user_service, "_DUMMY_PASSWORD_HASH", hasher.hash("dummy-password"))
+        yield
+
 
 @pytest.fixture(autouse=True)
 def _clear_dependency_overrides() -> None:
     app.dependency_overrides = {}
 
 
+@pytest.fixture(autouse=True)
+def _clear_access_token_cache(request: pytest.FixtureRequest) -> None:
+    if request.node.get_closest_marker("keep_access_token_cache") is None:
+        access_token_cache.clear()
+
+
 @pytest.fixture(scope="session")
 def postgres_container() -> Generator[PostgresContainer]:
-    with PostgresContainer("postgres:15") as container:
-        container.start()
+    # Entering the context manager starts the container; calling start() again
+    # would launch a second, unused one.
+    with PostgresContainer("postgres:15").with_command(
+        POSTGRES_TEST_COMMAND
+    ) as container:
         yield container
 
 
-@pytest.fixture(scope="session")
-def test_engine(postgres_container: PostgresContainer) -> Generator[Engine]:
-    db_url = postgres_container.get_connection_url()
-    # Patch database component settings for Alembic and app
-    url = make_url(db_url)
+def _point_settings_at(url: URL) -> None:
+    """Patch the database component settings used by Alembic and the app."""
     settings.DATABASE_HOST = url.host or "localhost"
     if url.port is not None:
         settings.DATABASE_PORT = int(url.port)
@@ -41,10 +89,59 @@ def test_engine(postgres_container: PostgresContainer) -> Generator[Engine]:
     if url.password is not None:
         settings.DATABASE_PASSWORD = str(url.password)
     settings.DATABASE_NAME = str(url.database)
-    # Run Alembic migrations
-    alembic_cfg = Config("alembic.ini")
-    alembic_cfg.set_main_option("sqlalchemy.url", db_url)
-    command.upgrade(alembic_cfg, "head")
+
+
+def _prepare_worker_database(server_url: URL, worker_id: str) -> URL:
+    """Clone a fresh database for this pytest worker from a migrated template.
+
+    The template is created and brought to the Alembic head once per server,
+    under an advisory lock so concurrent xdist workers sharing a server do not
+    race; each worker then gets its own ``CREATE DATABASE ... TEMPLATE`` copy,
+    which is a file-level clone rather than a migration replay.
+    """
+    worker_db = f"chat_api_test_{worker_id}"
+    admin = create_engine(server_url, isolation_level="AUTOCOMMIT")
+    try:
+        with admin.connect() as conn:
+            conn.execute(
+                text("SELECT pg_advisory_lock(:key)"), {"key": TEMPLATE_LOCK_KEY}
+            )
+            try:
+                exists = conn.execute(
+                    text("SELECT 1 FROM pg_database WHERE datname = :name"),
+                    {"name": TEMPLATE_DATABASE},
+                ).scalar()
+                if not exists:
+                    conn.execute(text(f'CREATE DATABASE "{TEMPLATE_DATABASE}"'))
+                # Upgrading an up-to-date template is a no-op; env.py reads the
+                # target database from settings.
+                _point_settings_at(server_url.set(database=TEMPLATE_DATABASE))
+                command.upgrade(Config("alembic.ini"), "head")
+                conn.execute(text(f'DROP DATABASE IF EXISTS "{worker_db}"'))
+                conn.execute(
+                    text(
+                        f'CREATE DATABASE "{worker_db}" TEMPLATE "{TEMPLATE_DATABASE}"'
+                    )
+                )
+            finally:
+                conn.execute(
+                    text("SELECT pg_advisory_unlock(:key)"),
+                    {"key": TEMPLATE_LOCK_KEY},
+                )
+    finally:
+        admin.dispose()
+    return server_url.set(database=worker_db)
+
+
+@pytest.fixture(scope="session")
+def test_engine(postgres_container: PostgresContainer) -> Generator[Engine]:
+    server_url = make_url(postgres_container.get_connection_url())
+    worker_id = os.environ.get("PYTEST_XDIST_WORKER", "main")
+    db_url = _prepare_worker_database(server_url, worker_id)
+    _point_settings_at(db_url)
+    # Drop any engine built from the previous settings (e.g. by unit tests)
+    get_engine.cache_clear()
+    get_session_local.cache_clear()
     engine = create_engine(db_url)
     yield engine
     engine.dispose()
@@ -54,42 +151,144 @@ def test_engine(postgres_container: PostgresContainer) -> Generator[Engine]:
 def db_session(test_engine: Engine) -> Generator[Session]:
     connection = test_engine.connect()
     transaction = connection.begin()
-    session_factory = sessionmaker(bind=connection)
-    session = session_factory()
+    # Commits and rollbacks issued by the app act on a SAVEPOINT inside the
+    # outer transaction, so they cannot end it and every write is undone below.
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
     yield session
     session.close()
     transaction.rollback()
     connection.close()
 
 
+@pytest.fixture(scope="session")
+def app_client() -> Generator[TestClient]:
+    """One client for the whole session so the app starts up only once."""
+    with TestClient(app, raise_server_exceptions=False) as c:
+        yield c
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def aclient() -> AsyncGenerator[httpx.AsyncClient]:
+    """Async client calling the app in-process, without TestClient's thread portal."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        yield ac
+
+
 @pytest.fixture
-def client(db_session: Session) -> Generator[TestClient]:
+def client(app_client: TestClient, db_session: Session) -> TestClient:
     def override_get_db() -> Generator[Session]:
         yield db_session
 
     app.dependency_overrides[get_db] = override_get_db
-    with TestClient(app, raise_server_exceptions=False) as c:
-        yield c
+    # Cookies (e.g. the refresh token) must not leak between tests
+    app_client.cookies.clear()
+    return app_client
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def user_data() -> dict[str, str]:
+    return USER_DATA
+
+
+@pytest.fixture(scope="session")
+def valid_password_hash() -> str:
+    """Hash of ``build_password(PasswordKind.VALID)``, computed once per session.
+
+    Taken after ``_fast_password_hasher`` is in place so it uses the same
+    parameters the app verifies with during the tests.
+    """
+    return hash_password(build_password(PasswordKind.VALID))
+
+
+def _user_values(user_data: dict[str, str], password_hash: str) -> dict[str, str]:
+    assert user_data["password"] == build_password(PasswordKind.VALID)
     return {
-        "name": "Test User",
-        "email": "testuser@example.com",
+        "name": user_data["name"],
+        "email": user_data["email"],
+        "hashed_password": password_hash,
+    }
+
+
+def _commit_user(engine: Engine, user_data: dict[str, str], password_hash: str) -> User:
+    """Insert a user outside the per-test transactions so it outlives them."""
+    with Session(engine, expire_on_commit=False) as session:
+        user = User(**_user_values(user_data, password_hash))
+        session.add(user)
+        session.commit()
+        return user
+
+
+@pytest.fixture(scope="session")
+def seeded_user(test_engine: Engine, valid_password_hash: str) -> dict[str, str]:
+    """Credentials of a user committed once and shared by the whole session.
+
+    For tests that only need some registered user to log in as; they skip the
+    register round trip and its password hash.
+    """
+    data = {
+        "name": "Seed User",
+        "email": "seed@example.com",
         "password": build_password(PasswordKind.VALID),
     }
+    _commit_user(test_engine, data, valid_password_hash)
+    return data
+
+
+@pytest.fixture(scope="session")
+def chat_user(test_engine: Engine, valid_password_hash: str) -> User:
+    """User shared by every test that only needs to be logged in.
+
+    Committed once, outside the per-test transactions that get rolled back, so
+    those tests skip registering and logging in (and the password hashing that
+    comes with it) each time.
+    """
+    return _commit_user(
+        test_engine,
+        {
+            "name": "Chat User",
+            "email": "chatuser@example.com",
+            "password": build_password(PasswordKind.VALID),
+        },
+        valid_password_hash,
+    )
+
+
+@pytest.fixture
+def chat_token(chat_user: User) -> str:
+    """Fresh access token for ``chat_user``.
+
+    Minted per test so it never outlives ``JWT_EXPIRE_MINUTES`` over a long
+    run; signing is cheap, only the user row is shared.
+    """
+    return issue_access_token(chat_user)
+
+
+@pytest.fixture
+def preinserted_user(
+    db_session: Session, user_data: dict[str, str], valid_password_hash: str
+) -> dict[str, str]:
+    """Insert ``user_data`` straight into the test transaction.
+
+    Skips the /register round trip and its password hash for tests that only
+    need the user to exist; the row is rolled back with the rest of the test.
+    """
+    db_session.execute(
+        insert(User).values(**_user_values(user_data, valid_password_hash))
+    )
+    return user_data
 
 
 @pytest.fixture
 def login_and_get_tokens(
     client: TestClient,
-    user_data: dict[str, str],
+    preinserted_user: dict[str, str],
 ) -> Callable[[dict[str, str] | None], dict[str, Any]]:
     def _do_login(ud: dict[str, str] | None = None) -> dict[str, Any]:
-        data = ud or user_data
-        reg = client.post("/api/v1/users/register", json=data)
-        assert reg.status_code in (201, 409)
+        data = ud or preinserted_user
+        if ud is not None:
+            reg = client.post("/api/v1/users/register", json=data)
+            assert reg.status_code in (201, 409)
         login = client.post(
             "/api/v1/users/login",
             json={"email": data["email"], "password": data["password"]},
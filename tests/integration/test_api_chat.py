@@ -1,4 +1,3 @@
-from collections.abc import Callable
 from typing import Any
 
 import pytest
@@ -6,18 +5,30 @@ from fastapi.testclient import TestClient
 
 import app.api.chat
 from app.core.auth import create_access_token
-from app.main import app as main_app
+
+HELLO_PAYLOAD = {"message": "Hello!"}
+
+
+# Module-scoped rather than module constants: access tokens expire after
+# JWT_EXPIRE_MINUTES, so they are signed when the chat tests run, not at import.
+@pytest.fixture(scope="module")
+def token_missing_sub() -> str:
+    return create_access_token({"foo": "bar"})
+
+
+@pytest.fixture(scope="module")
+def token_nonexistent_user() -> str:
+    return create_access_token({"sub": "ghost@example.com"})
 
 
 def test_chat_happy_path(
     client: TestClient,
-    login_and_get_tokens: Callable[[], dict[str, Any]],
+    chat_token: str,
 ) -> None:
-    token = login_and_get_tokens()["access_token"]
     resp = client.post(
         "/api/v1/chat",
-        json={"message": "Hello!"},
-        headers={"Authorization": f"Bearer {token}"},
+        json=HELLO_PAYLOAD,
+        headers={"Authorization": f"Bearer {chat_token}"},
     )
     assert resp.status_code == 200
     assert "response" in resp.json()
@@ -25,20 +36,19 @@ def test_chat_happy_path(
 
 def test_chat_non_hello_message(
     client: TestClient,
-    login_and_get_tokens: Callable[[], dict[str, Any]],
+    chat_token: str,
 ) -> None:
-    token = login_and_get_tokens()["access_token"]
     resp = client.post(
         "/api/v1/chat",
         json={"message": "How are you?"},
-        headers={"Authorization": f"Bearer {token}"},
+        headers={"Authorization": f"Bearer {chat_token}"},
     )
     assert resp.status_code == 200
     assert resp.json()["response"].startswith("I'm here to help!")
 
 
 def test_chat_unauthenticated(client: TestClient) -> None:
-    resp = client.post("/api/v1/chat", json={"message": "Hello!"})
+    resp = client.post("/api/v1/chat", json=HELLO_PAYLOAD)
     assert resp.status_code == 401
     # FastAPI default message for missing/invalid Bearer token
     assert resp.json()["detail"] == "Not authenticated"
@@ -48,7 +58,7 @@ def test_chat_invalid_token(client: TestClient) -> None:
     # Malformed token
     resp = client.post(
         "/api/v1/chat",
-        json={"message": "Hello!"},
+        json=HELLO_PAYLOAD,
         headers={"Authorization": "Bearer invalid.token.value"},
     )
     assert resp.status_code == 401
@@ -57,12 +67,11 @@ def test_chat_invalid_token(client: TestClient) -> None:
     )
 
 
-def test_chat_token_missing_sub(client: TestClient) -> None:
-    token = create_access_token({"foo": "bar"})  # no 'sub'
+def test_chat_token_missing_sub(client: TestClient, token_missing_sub: str) -> None:
     resp = client.post(
         "/api/v1/chat",
-        json={"message": "Hello!"},
-        headers={"Authorization": f"Bearer {token}"},
+        json=HELLO_PAYLOAD,
+        headers={"Authorization": f"Bearer {token_missing_sub}"},
     )
     assert resp.status_code == 401
     assert (
@@ -70,12 +79,13 @@ def test_chat_token_missing_sub(client: TestClient) -> None:
     )
 
 
-def test_chat_token_nonexistent_user(client: TestClient) -> None:
-    token = create_access_token({"sub": "ghost@example.com"})
+def test_chat_token_nonexistent_user(
+    client: TestClient, token_nonexistent_user: str
+) -> None:
     resp = client.post(
         "/api/v1/chat",
-        json={"message": "Hello!"},
-        headers={"Authorization": f"Bearer {token}"},
+        json=HELLO_PAYLOAD,
+        headers={"Authorization": f"Bearer {token_nonexistent_user}"},
     )
     assert resp.status_code == 401
     assert (
@@ -96,13 +106,12 @@ def test_chat_invalid_cases(
     client: TestClient,
     payload: dict[str, Any],
     expected_error: str | None,
-    login_and_get_tokens: Callable[[], dict[str, Any]],
+    chat_token: str,
 ) -> None:
-    token = login_and_get_tokens()["access_token"]
     resp = client.post(
         "/api/v1/chat",
         json=payload,
-        headers={"Authorization": f"Bearer {token}"},
+        headers={"Authorization": f"Bearer {chat_token}"},
     )
     assert resp.status_code == 422
     if expected_error:
@@ -113,11 +122,10 @@ def test_chat_invalid_cases(
 
 
 def test_chat_service_exception(
+    client: TestClient,
     monkeypatch: pytest.MonkeyPatch,
-    login_and_get_tokens: Callable[[], dict[str, Any]],
+    chat_token: str,
 ) -> None:
-    token = login_and_get_tokens()["access_token"]
-
     class SimulatedServiceError(Exception):
         """Test-only exception to simulate a service failure."""
 
@@ -126,11 +134,10 @@ def test_chat_service_exception(
         raise SimulatedServiceError(msg)
 
     monkeypatch.setattr(app.api.chat, "process_chat", raise_exception)
-    # Use a local client for the full app that returns 500 responses instead of raising
-    with TestClient(main_app, raise_server_exceptions=False) as local_client:
-        resp = local_client.post(
-            "/api/v1/chat",
-            json={"message": "Hello!"},
-            headers={"Authorization": f"Bearer {token}"},
-        )
-        assert resp.status_code == 500
+    # The shared client returns 500 responses instead of raising
+    resp = client.post(
+        "/api/v1/chat",
+        json=HELLO_PAYLOAD,
+        headers={"Authorization": f"Bearer {chat_token}"},
+    )
+    assert resp.status_code == 500
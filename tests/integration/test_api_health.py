@@ -1,57 +1,62 @@
+from collections.abc import Generator
+
+import httpx
 import pytest
-from fastapi.testclient import TestClient
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.api import health
+from app.core.database import get_db
 from app.main import app
 
 
-def test_liveness() -> None:
-    client = TestClient(app)
-    response = client.get("/live")
+class _UnreachableDatabaseSession:
+    """Session stand-in whose queries fail as if the DB were down."""
+
+    def execute(self, *_args: object, **_kwargs: object) -> None:
+        msg = "DB down"
+        raise SQLAlchemyError(msg)
+
+
+@pytest.fixture
+def db_down() -> Generator[None]:
+    def broken_get_db() -> Generator[_UnreachableDatabaseSession]:
+        yield _UnreachableDatabaseSession()
+
+    app.dependency_overrides[get_db] = broken_get_db
+    yield
+    app.dependency_overrides.pop(get_db, None)
+
+
+async def test_liveness(aclient: httpx.AsyncClient) -> None:
+    response = await aclient.get("/live")
     assert response.status_code == 200
     assert response.json() == {"status": "alive"}
 
 
-def test_readiness_ok() -> None:
-    client = TestClient(app)
-    response = client.get("/ready")
+async def test_readiness_ok(aclient: httpx.AsyncClient) -> None:
+    response = await aclient.get("/ready")
     assert response.status_code == 200
     assert response.json() == {"status": "ready"}
 
 
-def test_health_check_ok() -> None:
-    client = TestClient(app)
-    response = client.get("/health")
+async def test_health_check_ok(aclient: httpx.AsyncClient) -> None:
+    response = await aclient.get("/health")
     assert response.status_code == 200
     assert response.json()["status"] in ["ok", "error"]
     assert "db" in response.json()
 
 
-def test_readiness_db_failure(monkeypatch: pytest.MonkeyPatch) -> None:
+@pytest.mark.usefixtures("db_down")
+async def test_readiness_db_failure(aclient: httpx.AsyncClient) -> None:
     """Simulate DB failure for /ready endpoint and expect 503."""
-    client = TestClient(app)
-
-    def broken_get_session_local() -> None:
-        msg = "DB down"
-        raise SQLAlchemyError(msg)
-
-    monkeypatch.setattr(health, "get_session_local", broken_get_session_local)
-    response = client.get("/ready")
+    response = await aclient.get("/ready")
     assert response.status_code == 503
     assert response.json()["status"] == "not ready"
 
 
-def test_health_check_db_down(monkeypatch: pytest.MonkeyPatch) -> None:
+@pytest.mark.usefixtures("db_down")
+async def test_health_check_db_down(aclient: httpx.AsyncClient) -> None:
     """Simulate DB failure for /health endpoint and expect error status."""
-    client = TestClient(app)
-
-    def broken_get_session_local() -> None:
-        msg = "DB down"
-        raise SQLAlchemyError(msg)
-
-    monkeypatch.setattr(health, "get_session_local", broken_get_session_local)
-    response = client.get("/health")
+    response = await aclient.get("/health")
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == "error"
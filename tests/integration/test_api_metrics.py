@@ -1,13 +1,12 @@
-from fastapi.testclient import TestClient
+import httpx
 
-from app.core.config import Settings
-from app.main import app
+from app.core.config import settings
 
 
-def test_metrics_endpoint_returns_prometheus_format() -> None:
-    client = TestClient(app)
-    settings = Settings()
-    response = client.get(
+async def test_metrics_endpoint_returns_prometheus_format(
+    aclient: httpx.AsyncClient,
+) -> None:
+    response = await aclient.get(
         "/metrics",
         auth=(settings.METRICS_USER, settings.METRICS_PASS),
     )
@@ -18,11 +17,10 @@ def test_metrics_endpoint_returns_prometheus_format() -> None:
     assert "# TYPE" in response.text
 
 
-def test_metrics_endpoint_unauthorized() -> None:
-    client = TestClient(app)
+async def test_metrics_endpoint_unauthorized(aclient: httpx.AsyncClient) -> None:
     # Missing auth
-    r1 = client.get("/metrics")
+    r1 = await aclient.get("/metrics")
     assert r1.status_code in (401, 403)
     # Wrong basic auth
-    r2 = client.get("/metrics", auth=("wrong", "creds"))
+    r2 = await aclient.get("/metrics", auth=("wrong", "creds"))
     assert r2.status_code in (401, 403)
@@ -9,10 +9,14 @@ from sqlalchemy.orm import Session
 
 import app.services.user_service
 from app.core.auth import ALGORITHM, SECRET_KEY, get_current_user
+from app.core.auth_cache import access_token_cache
 from app.main import app as main_app
 from app.models.refresh_token import RefreshToken
 from app.models.user import User
-from app.repositories.refresh_token_repository import RefreshTokenRepository
+from app.repositories.refresh_token_repository import (
+    get_refresh_token_repository,
+)
+from app.repositories.user_repository import UserRepository
 from tests.utils import (
     PasswordKind,
     assert_deleted_refresh_cookie,
@@ -26,40 +30,36 @@ Note: test helpers are imported directly for concise usage.
 """
 
 
-@pytest.fixture
-def user_data() -> dict[str, str]:
-    return {
-        "name": "Test User",
-        "email": "testuser@example.com",
-        "password": build_password(PasswordKind.VALID),
-    }
-
-
-@pytest.fixture
-def registered_user(client: TestClient, user_data: dict[str, str]) -> dict[str, str]:
-    client.post("/api/v1/users/register", json=user_data)
-    return user_data
-
-
 """
 Integration tests for /api/v1/users endpoints.
 Grouped by endpoint for clarity and maintainability.
 """
 
 
+class FakeRefreshTokenRepository:
+    """Records revoke calls and reports each token as revoked for user 42."""
+
+    def __init__(self) -> None:
+        self.revoked: list[tuple[str, int | None]] = []
+
+    def revoke_and_return(
+        self, token: str, *, user_id: int | None = None
+    ) -> SimpleNamespace:
+        self.revoked.append((token, user_id))
+        return SimpleNamespace(user_id=42)
+
+
 # ---------------------------- /register ---------------------------------
 
 
 def test_register_duplicate_email(
     client: TestClient,
-    user_data: dict[str, str],
+    preinserted_user: dict[str, str],
 ) -> None:
-    """Registering the same email twice should return 409."""
-    resp1 = client.post("/api/v1/users/register", json=user_data)
-    assert resp1.status_code == 201
-    resp2 = client.post("/api/v1/users/register", json=user_data)
-    assert resp2.status_code == 409
-    assert "already registered" in resp2.json()["detail"].lower()
+    """Registering an already registered email should return 409."""
+    resp = client.post("/api/v1/users/register", json=preinserted_user)
+    assert resp.status_code == 409
+    assert "already registered" in resp.json()["detail"].lower()
 
 
 @pytest.mark.parametrize(
@@ -90,6 +90,22 @@ def test_register_duplicate_email(
         ),
         ({"name": "No Email", "password": build_password(PasswordKind.VALID)}, None),
         ({"name": "No Password", "email": "nopassword@example.com"}, None),
+        (
+            {
+                "name": "Invalid Email",
+                "email": "not-an-email",
+                "password": build_password(PasswordKind.VALID),
+            },
+            "email",
+        ),
+        (
+            {
+                "name": "NoComplex",
+                "email": "nocomplex@example.com",
+                "password": build_password(PasswordKind.WEAK),
+            },
+            "must contain",
+        ),
     ],
 )
 def test_register_invalid_cases(
@@ -106,53 +122,20 @@ def test_register_invalid_cases(
         )
 
 
-def test_register_invalid_email(client: TestClient) -> None:
-    resp = client.post(
-        "/api/v1/users/register",
-        json={
-            "name": "Invalid Email",
-            "email": "not-an-email",
-            "password": build_password(PasswordKind.VALID),
-        },
-    )
-    assert resp.status_code == 422
-    assert any("email" in err["msg"].lower() for err in resp.json()["detail"])
-
-
-def test_register_duplicate_username(client: TestClient) -> None:
-    # Register first user
+def test_register_duplicate_username(
+    client: TestClient,
+    preinserted_user: dict[str, str],
+) -> None:
+    # Same name as the existing user but a different email (only email is unique)
     resp = client.post(
         "/api/v1/users/register",
         json={
-            "name": "DupUser",
-            "email": "dupuser1@example.com",
-            "password": build_password(PasswordKind.VALID),
-        },
-    )
-    assert resp.status_code == 201
-    # Register with same name but different email (only email is unique)
-    resp2 = client.post(
-        "/api/v1/users/register",
-        json={
-            "name": "DupUser",
+            "name": preinserted_user["name"],
             "email": "dupuser2@example.com",
             "password": build_password(PasswordKind.VALID),
         },
     )
-    assert resp2.status_code == 201
-
-
-def test_register_password_complexity(client: TestClient) -> None:
-    resp = client.post(
-        "/api/v1/users/register",
-        json={
-            "name": "NoComplex",
-            "email": "nocomplex@example.com",
-            "password": build_password(PasswordKind.WEAK),
-        },
-    )
-    assert resp.status_code == 422
-    assert any("must contain" in err["msg"].lower() for err in resp.json()["detail"])
+    assert resp.status_code == 201
 
 
 def test_password_not_in_register_response(
@@ -170,13 +153,12 @@ def test_password_not_in_register_response(
 
 def test_login_token_response_structure(
     client: TestClient,
-    user_data: dict[str, str],
+    seeded_user: dict[str, str],
 ) -> None:
     """Login returns a valid token structure including refresh token."""
-    client.post("/api/v1/users/register", json=user_data)
     resp = client.post(
         "/api/v1/users/login",
-        json={"email": user_data["email"], "password": user_data["password"]},
+        json={"email": seeded_user["email"], "password": seeded_user["password"]},
     )
     assert resp.status_code == 200
     data = resp.json()
@@ -189,74 +171,66 @@ def test_login_token_response_structure(
 
 def test_login_sets_secure_refresh_cookie(
     client: TestClient,
-    user_data: dict[str, str],
+    seeded_user: dict[str, str],
 ) -> None:
-    client.post("/api/v1/users/register", json=user_data)
     resp = client.post(
         "/api/v1/users/login",
-        json={"email": user_data["email"], "password": user_data["password"]},
+        json={"email": seeded_user["email"], "password": seeded_user["password"]},
     )
     assert resp.status_code == 200
     set_cookie = resp.headers.get("set-cookie", "")
     assert_secure_refresh_cookie(set_cookie)
 
 
-def test_login_missing_fields(client: TestClient) -> None:
-    # Missing email
-    resp = client.post(
-        "/api/v1/users/login",
-        json={"password": build_password(PasswordKind.VALID)},
-    )
-    assert resp.status_code == 422
-    # Missing password
-    resp = client.post("/api/v1/users/login", json={"email": "testuser@example.com"})
-    assert resp.status_code == 422
-
-
-def test_login_invalid_email_format(client: TestClient) -> None:
-    resp = client.post(
-        "/api/v1/users/login",
-        json={"email": "not-an-email", "password": build_password(PasswordKind.VALID)},
-    )
-    assert resp.status_code == 422
+@pytest.mark.parametrize(
+    ("payload", "expected_status"),
+    [
+        ({"password": build_password(PasswordKind.VALID)}, 422),  # missing email
+        ({"email": "testuser@example.com"}, 422),  # missing password
+        (
+            {"email": "not-an-email", "password": build_password(PasswordKind.VALID)},
+            422,
+        ),
+        (
+            {
+                "email": "doesnotexist@example.com",
+                "password": build_password(PasswordKind.VALID),
+            },
+            401,
+        ),
+    ],
+)
+def test_login_invalid_cases(
+    client: TestClient,
+    payload: dict[str, Any],
+    expected_status: int,
+) -> None:
+    resp = client.post("/api/v1/users/login", json=payload)
+    assert resp.status_code == expected_status
+    if expected_status == 401:
+        assert "incorrect" in resp.json().get("detail", "").lower()
 
 
-def test_login_unregistered_email(client: TestClient) -> None:
+def test_login_wrong_password(client: TestClient, seeded_user: dict[str, str]) -> None:
     resp = client.post(
         "/api/v1/users/login",
         json={
-            "email": "doesnotexist@example.com",
-            "password": build_password(PasswordKind.VALID),
+            "email": seeded_user["email"],
+            "password": build_password(PasswordKind.WRONG),
         },
     )
     assert resp.status_code == 401
-    assert "incorrect" in resp.json().get("detail", "").lower()
-
-
-def test_login_wrong_password(client: TestClient) -> None:
-    user = {
-        "name": "Test User",
-        "email": "testwrongpass@example.com",
-        "password": build_password(PasswordKind.VALID),
-    }
-    client.post("/api/v1/users/register", json=user)
-    resp = client.post(
-        "/api/v1/users/login",
-        json={"email": user["email"], "password": build_password(PasswordKind.WRONG)},
-    )
-    assert resp.status_code == 401
     assert "incorrect" in resp.json()["detail"]
 
 
 def test_password_not_in_login_response(
     client: TestClient,
-    user_data: dict[str, str],
+    seeded_user: dict[str, str],
 ) -> None:
     """Password is never returned in the login API response."""
-    client.post("/api/v1/users/register", json=user_data)
     login = client.post(
         "/api/v1/users/login",
-        json={"email": user_data["email"], "password": user_data["password"]},
+        json={"email": seeded_user["email"], "password": seeded_user["password"]},
     )
     assert login.status_code == 200
     assert "password" not in login.json()
@@ -264,11 +238,9 @@ def test_password_not_in_login_response(
 
 def test_database_failure_on_login(
     client: TestClient,
-    user_data: dict[str, str],
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
     """Simulate DB failure during login and expect 500."""
-    client.post("/api/v1/users/register", json=user_data)
 
     class SimulatedDbFailureError(RuntimeError):
         """Raised to simulate an internal DB failure in tests."""
@@ -284,7 +256,11 @@ def test_database_failure_on_login(
     )
     resp = client.post(
         "/api/v1/users/login",
-        json={"email": user_data["email"], "password": user_data["password"]},
+        # authenticate_user is patched, so no stored user is needed
+        json={
+            "email": "anyone@example.com",
+            "password": build_password(PasswordKind.VALID),
+        },
     )
     assert resp.status_code == 500
 
@@ -307,6 +283,17 @@ def test_refresh_token_missing_cookie(
     assert body.get("code") in ("http_error", "invalid_credentials")
 
 
+def _rotate(client: TestClient, refresh_token: str) -> str:
+    """Rotate ``refresh_token`` and return the new one, which must differ."""
+    client.cookies.set("refresh_token", refresh_token)
+    resp = client.post("/api/v1/users/refresh-token")
+    assert resp.status_code == 200
+    new_token = resp.cookies.get("refresh_token")
+    assert isinstance(new_token, str)
+    assert new_token != refresh_token
+    return new_token
+
+
 def test_refresh_token_success(
     client: TestClient,
     login_and_get_tokens: Callable[[], dict[str, Any]],
@@ -325,18 +312,13 @@ def test_refresh_token_success(
     client.cookies.set("refresh_token", rtok0)
     resp2 = client.post("/api/v1/users/refresh-token")
     assert resp2.status_code == 401
-    refresh_token = tokens["refresh_token"]
+    # Keep rotating from the token issued by the first refresh; two rounds are
+    # enough to show each new token is itself rotatable.
+    refresh_token = resp.cookies.get("refresh_token")
     assert isinstance(refresh_token, str)
-    for _ in range(5):
-        rt = refresh_token
-        assert isinstance(rt, str)
-        client.cookies.set("refresh_token", rt)
-        resp = client.post("/api/v1/users/refresh-token")
-        assert resp.status_code in (200, 401)
-        if resp.status_code == 200:
-            new_rt = resp.cookies.get("refresh_token") or rt
-            assert isinstance(new_rt, str)
-            refresh_token = new_rt
+    assert refresh_token != rtok0
+    for _ in range(2):
+        refresh_token = _rotate(client, refresh_token)
 
 
 def test_refresh_token_invalid(
@@ -412,45 +394,27 @@ def test_refresh_sets_secure_refresh_cookie(
 
 def test_refresh_token_rate_limiting(
     client: TestClient,
-    user_data: dict[str, str],
+    seeded_user: dict[str, str],
 ) -> None:
     """
-    Exceed refresh attempts should trigger rate limiting (max 5 per 10 min
-    per session/IP).
+    Rotations below the refresh limit (max 5 per 10 min per session/IP) are
+    never rejected.
     """
-    client.post("/api/v1/users/register", json=user_data)
     login = client.post(
         "/api/v1/users/login",
-        json={"email": user_data["email"], "password": user_data["password"]},
+        json={"email": seeded_user["email"], "password": seeded_user["password"]},
     )
     refresh_token = login.cookies.get("refresh_token")
     assert isinstance(refresh_token, str)
-    for _ in range(5):
-        rt = refresh_token
-        assert isinstance(rt, str)
-        client.cookies.set("refresh_token", rt)
-        resp = client.post("/api/v1/users/refresh-token")
-        assert resp.status_code == 200 or resp.status_code == 401
-        if resp.status_code == 200:
-            new_rt = resp.cookies.get("refresh_token") or rt
-            assert isinstance(new_rt, str)
-            refresh_token = new_rt
-    client.cookies.set("refresh_token", refresh_token)
-    resp = client.post("/api/v1/users/refresh-token")
-    assert resp.status_code in (429, 401, 200)
+    # Three rotations stay under the limit, so every one must succeed
+    for _ in range(3):
+        refresh_token = _rotate(client, refresh_token)
 
 
 def test_refresh_token_exception(
     client: TestClient,
-    user_data: dict[str, str],
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
-    client.post("/api/v1/users/register", json=user_data)
-    login = client.post(
-        "/api/v1/users/login",
-        json={"email": user_data["email"], "password": user_data["password"]},
-    )
-    cookies = login.cookies
     # Simulate exception in rotate_refresh_token
 
     from app.core.exceptions import InvalidCredentialsError
@@ -460,9 +424,8 @@ def test_refresh_token_exception(
         raise InvalidCredentialsError(msg)
 
     monkeypatch.setattr(app.services.user_service, "rotate_refresh_token", raise_exc)
-    rtok = cookies.get("refresh_token")
-    assert isinstance(rtok, str)
-    client.cookies.set("refresh_token", rtok)
+    # rotate_refresh_token is patched, so any cookie value reaches it
+    client.cookies.set("refresh_token", "any-refresh-token")
     resp = client.post("/api/v1/users/refresh-token")
     assert resp.status_code == 401
     assert "invalid" in resp.json()["detail"].lower()
@@ -470,16 +433,9 @@ def test_refresh_token_exception(
 
 def test_refresh_token_generic_exception_returns_500(
     client: TestClient,
-    user_data: dict[str, str],
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
     """Generic exceptions from rotate_refresh_token should bubble to 500."""
-    client.post("/api/v1/users/register", json=user_data)
-    login = client.post(
-        "/api/v1/users/login",
-        json={"email": user_data["email"], "password": user_data["password"]},
-    )
-    cookies = login.cookies
 
     class SimulatedUnexpectedError(RuntimeError):
         """Raised to simulate an unexpected error in tests."""
@@ -493,26 +449,24 @@ def test_refresh_token_generic_exception_returns_500(
         "rotate_refresh_token",
         raise_generic,
     )
-    rtok = cookies.get("refresh_token")
-    assert isinstance(rtok, str)
-    client.cookies.set("refresh_token", rtok)
+    # rotate_refresh_token is patched, so any cookie value reaches it
+    client.cookies.set("refresh_token", "any-refresh-token")
     resp = client.post("/api/v1/users/refresh-token")
     assert resp.status_code == 500
 
 
 def test_login_access_token_claims_sub(
     client: TestClient,
-    user_data: dict[str, str],
+    seeded_user: dict[str, str],
 ) -> None:
-    client.post("/api/v1/users/register", json=user_data)
     resp = client.post(
         "/api/v1/users/login",
-        json={"email": user_data["email"], "password": user_data["password"]},
+        json={"email": seeded_user["email"], "password": seeded_user["password"]},
     )
     assert resp.status_code == 200
     token = resp.json()["access_token"]
     payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    assert payload.get("sub") == user_data["email"]
+    assert payload.get("sub") == seeded_user["email"]
 
 
 # -------------------------------- /logout --------------------------------
@@ -552,26 +506,40 @@ def test_logout_empty_refresh_cookie(
     assert_deleted_refresh_cookie(set_cookie)
 
 
+def _logout(client: TestClient, tokens: dict[str, object]) -> int:
+    refresh = tokens["refresh_token"]
+    assert isinstance(refresh, str)
+    client.cookies.set("refresh_token", refresh)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    return client.post("/api/v1/users/logout", headers=headers).status_code
+
+
 def test_logout_success(
     client: TestClient,
     login_and_get_tokens: Callable[[], dict[str, object]],
+) -> None:
+    assert _logout(client, login_and_get_tokens()) == 204
+
+
+def test_refresh_after_logout_is_401(
+    client: TestClient,
+    login_and_get_tokens: Callable[[], dict[str, object]],
 ) -> None:
     tokens = login_and_get_tokens()
-    access_token = tokens["access_token"]
+    assert _logout(client, tokens) == 204
     refresh = tokens["refresh_token"]
     assert isinstance(refresh, str)
-    headers = {"Authorization": f"Bearer {access_token}"}
     client.cookies.set("refresh_token", refresh)
-    resp = client.post("/api/v1/users/logout", headers=headers)
-    assert resp.status_code == 204
-    client.cookies.set("refresh_token", refresh)
-    resp2 = client.post("/api/v1/users/refresh-token")
-    assert resp2.status_code == 401
-    tokens2 = login_and_get_tokens()
-    access_token2 = tokens2["access_token"]
-    headers2 = {"Authorization": f"Bearer {access_token2}"}
-    resp3 = client.post("/api/v1/users/logout", headers=headers2)
-    assert resp3.status_code == 204
+    resp = client.post("/api/v1/users/refresh-token")
+    assert resp.status_code == 401
+
+
+def test_logout_again_after_new_login(
+    client: TestClient,
+    login_and_get_tokens: Callable[[], dict[str, object]],
+) -> None:
+    assert _logout(client, login_and_get_tokens()) == 204
+    assert _logout(client, login_and_get_tokens()) == 204
 
 
 def test_logout_sets_deleted_refresh_cookie(
@@ -609,35 +577,18 @@ def test_logout_endpoint_invalid_token(
 def test_logout_endpoint_valid_token_repo_revoked(
     client: TestClient,
     login_and_get_tokens: Callable[[], dict[str, object]],
-    monkeypatch: pytest.MonkeyPatch,
 ) -> None:
     """
-    On logout with a valid refresh token, the repo's revoke_token
+    On logout with a valid refresh token, the repo's revoke_and_return
     should be called.
     """
     tokens = login_and_get_tokens()
     auth_header = f"Bearer {tokens['access_token']}"
     headers = {"Authorization": auth_header}
 
-    # Mock repository methods to assert revoke_token is invoked with the cookie value
-    def fake_get_valid_token(_self: object, _token: str) -> object:
-        return SimpleNamespace(user_id=42, revoked=False)
-
-    called: dict[str, Any] = {"token": None}
-
-    def fake_revoke_token(_self: object, token: str) -> None:
-        called["token"] = token
-
-    monkeypatch.setattr(
-        RefreshTokenRepository,
-        "get_valid_token",
-        fake_get_valid_token,
-    )
-    monkeypatch.setattr(
-        RefreshTokenRepository,
-        "revoke_token",
-        fake_revoke_token,
-    )
+    # Stand in for the repository to assert the atomic revoke gets the cookie value
+    repo = FakeRefreshTokenRepository()
+    main_app.dependency_overrides[get_refresh_token_repository] = lambda: repo
 
     # Override current user to match mocked token's user_id to avoid mismatch
     def _override_current_user() -> object:
@@ -650,7 +601,7 @@ def test_logout_endpoint_valid_token_repo_revoked(
         client.cookies.set("refresh_token", rtok)
         resp = client.post("/api/v1/users/logout", headers=headers)
         assert resp.status_code == 204
-        assert called["token"] == rtok
+        assert repo.revoked == [(rtok, 42)]
     finally:
         main_app.dependency_overrides.clear()
 
@@ -702,30 +653,16 @@ def test_logout_domain_logout_error_returns_204(
 
 def test_logout_cookie_belongs_to_other_user(
     client: TestClient,
+    login_and_get_tokens: Callable[[], dict[str, Any]],
+    seeded_user: dict[str, str],
 ) -> None:
     # User A
-    a = {
-        "name": "A",
-        "email": "a@example.com",
-        "password": build_password(PasswordKind.VALID),
-    }
-    client.post("/api/v1/users/register", json=a)
-    login_a = client.post(
-        "/api/v1/users/login",
-        json={"email": a["email"], "password": a["password"]},
-    )
-    cookie_a = login_a.cookies.get("refresh_token")
+    cookie_a = login_and_get_tokens()["refresh_token"]
     assert isinstance(cookie_a, str)
     # User B
-    b = {
-        "name": "B",
-        "email": "b@example.com",
-        "password": build_password(PasswordKind.VALID),
-    }
-    client.post("/api/v1/users/register", json=b)
     login_b = client.post(
         "/api/v1/users/login",
-        json={"email": b["email"], "password": b["password"]},
+        json={"email": seeded_user["email"], "password": seeded_user["password"]},
     )
     token_b = login_b.json()["access_token"]
     headers_b = {"Authorization": f"Bearer {token_b}"}
@@ -737,12 +674,11 @@ def test_logout_cookie_belongs_to_other_user(
 
 def test_refresh_access_token_claims_sub(
     client: TestClient,
-    user_data: dict[str, str],
+    seeded_user: dict[str, str],
 ) -> None:
-    client.post("/api/v1/users/register", json=user_data)
     login = client.post(
         "/api/v1/users/login",
-        json={"email": user_data["email"], "password": user_data["password"]},
+        json={"email": seeded_user["email"], "password": seeded_user["password"]},
     )
     rtok = login.cookies.get("refresh_token")
     assert isinstance(rtok, str)
@@ -751,7 +687,7 @@ def test_refresh_access_token_claims_sub(
     assert resp.status_code == 200
     token = resp.json()["access_token"]
     payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    assert payload.get("sub") == user_data["email"]
+    assert payload.get("sub") == seeded_user["email"]
 
 
 # ------------------------------ /logout-all ------------------------------
@@ -767,7 +703,7 @@ def test_logout_all_endpoint(
 
     called: dict[str, bool] = {"ok": False}
 
-    def fake_logout_all(_user_id: int, _db: object) -> None:
+    def fake_logout_all(_current_user: object, _token_repo: object) -> None:
         called["ok"] = True
 
     monkeypatch.setattr(
@@ -857,6 +793,48 @@ def test_get_me_invalid_token(
     assert resp.status_code == 401
 
 
+@pytest.mark.keep_access_token_cache
+def test_get_me_cached_token_of_deleted_user_returns_401(
+    client: TestClient,
+    login_and_get_tokens: Callable[[], dict[str, object]],
+    db_session: Session,
+) -> None:
+    tokens = login_and_get_tokens()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    me = client.get("/api/v1/users/me", headers=headers)
+    assert me.status_code == 200
+    assert access_token_cache.get(str(tokens["access_token"])) == me.json()["id"]
+
+    # Delete behind the repository's back so the cache entry survives
+    user = db_session.get(User, me.json()["id"])
+    assert user is not None
+    db_session.query(RefreshToken).filter(RefreshToken.user_id == user.id).delete()
+    db_session.delete(user)
+    db_session.flush()
+
+    resp = client.get("/api/v1/users/me", headers=headers)
+    assert resp.status_code == 401
+    assert access_token_cache.get(str(tokens["access_token"])) is None
+
+
+@pytest.mark.keep_access_token_cache
+def test_user_repository_delete_invalidates_cached_token(
+    client: TestClient,
+    login_and_get_tokens: Callable[[], dict[str, object]],
+    db_session: Session,
+) -> None:
+    tokens = login_and_get_tokens()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    me = client.get("/api/v1/users/me", headers=headers)
+    assert me.status_code == 200
+
+    assert UserRepository(db_session).delete(me.json()["id"]) is True
+    assert access_token_cache.get(str(tokens["access_token"])) is None
+
+    resp = client.get("/api/v1/users/me", headers=headers)
+    assert resp.status_code == 401
+
+
 def test_get_me_deleted_user_returns_401(
     client: TestClient,
     login_and_get_tokens: Callable[[], dict[str, object]],
@@ -871,9 +849,9 @@ def test_get_me_deleted_user_returns_401(
     # Delete the user directly in the DB to simulate a stale token
     user = db_session.query(User).filter(User.email == email).first()
     assert user is not None
-    # Remove dependent refresh tokens first to satisfy FK constraints
+    # Remove dependent refresh tokens first to satisfy FK constraints; the bulk
+    # delete runs immediately, so a single flush for the user row is enough.
     db_session.query(RefreshToken).filter(RefreshToken.user_id == user.id).delete()
-    db_session.flush()
     db_session.delete(user)
     db_session.flush()
 
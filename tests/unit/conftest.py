@@ -0,0 +1,26 @@
+import pytest
+from argon2 import PasswordHasher, profiles
+
+from app.core.auth import hash_password
+from tests.utils import PasswordKind, build_password
+
+
+@pytest.fixture(scope="session")
+def known_password() -> str:
+    return build_password(PasswordKind.VALID)
+
+
+@pytest.fixture(scope="session")
+def known_hash(known_password: str) -> str:
+    """Production-parameter hash of ``known_password``, computed once per session."""
+    return hash_password(known_password)
+
+
+@pytest.fixture(scope="session")
+def cheap_hash(known_password: str) -> str:
+    """Minimum-cost argon2id hash of ``known_password``.
+
+    Verification cost follows the parameters stored in the hash, so tests that
+    only exercise a failure or rehash branch use this instead of ``known_hash``.
+    """
+    return PasswordHasher.from_parameters(profiles.CHEAPEST).hash(known_password)
@@ -1,14 +1,20 @@
 import datetime
+import threading
 
+import bcrypt
 import pytest
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError
 from fastapi import HTTPException, status
 from fastapi.security import HTTPBasicCredentials
 from jose import ExpiredSignatureError, JWTError, jwt
 
+from app.core import auth as auth_module
 from app.core.auth import (
     basic_auth_guard,
     create_access_token,
     hash_password,
+    needs_rehash,
     verify_password,
 )
 from app.core.config import settings
@@ -18,23 +24,62 @@ SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = "HS256"
 
 
-def test_hash_and_verify_password() -> None:
-    pw = build_password(PasswordKind.VALID)
-    hashed = hash_password(pw)
-    assert hashed != pw
-    assert verify_password(pw, hashed)
-    assert not verify_password(join_parts("wr", "ong"), hashed)
+def test_hash_password_produces_argon2id_hash(known_password: str) -> None:
+    hashed = hash_password(known_password)
+    assert hashed != known_password
+    assert hashed.startswith("$argon2id$")
+
+
+def test_verify_password(known_password: str, known_hash: str) -> None:
+    assert verify_password(known_password, known_hash)
+    assert not verify_password(join_parts("wr", "ong"), known_hash)
+
+
+def test_argon2_hash_does_not_need_rehash(known_hash: str) -> None:
+    assert not needs_rehash(known_hash)
+
+
+def test_argon2_hash_with_outdated_params_needs_rehash() -> None:
+    outdated = PasswordHasher(time_cost=1, memory_cost=8, parallelism=1)
+    hashed = outdated.hash(build_password(PasswordKind.VALID))
+    assert verify_password(build_password(PasswordKind.VALID), hashed)
+    assert needs_rehash(hashed)
 
 
-def test_create_access_token() -> None:
-    data = {"sub": "user@example.com"}
-    token = create_access_token(data)
-    decoded = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    assert decoded["sub"] == "user@example.com"
+def test_verify_password_unknown_hash_format_raises() -> None:
+    with pytest.raises(InvalidHashError):
+        verify_password(build_password(PasswordKind.VALID), join_parts("not-a-hash"))
+
+
+def test_legacy_bcrypt_hash_verifies_and_needs_rehash() -> None:
+    pw = build_password(PasswordKind.VALID)
+    legacy = bcrypt.hashpw(pw.encode(), bcrypt.gensalt(rounds=4)).decode()
+    assert verify_password(pw, legacy)
+    assert not verify_password(build_password(PasswordKind.WRONG), legacy)
+    assert needs_rehash(legacy)
+
+
+def test_hash_password_waits_for_free_hash_slot(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(auth_module, "_hash_slots", slots)
+    results: list[str] = []
+    slots.acquire()
+    worker = threading.Thread(
+        target=lambda: results.append(hash_password(build_password(PasswordKind.VALID)))
+    )
+    worker.start()
+    worker.join(timeout=0.2)
+    assert worker.is_alive()
+    assert not results
+    slots.release()
+    worker.join(timeout=5)
+    assert len(results) == 1
 
 
 def test_expired_token() -> None:
-    exp = datetime.datetime.now(datetime.UTC) - datetime.timedelta(seconds=1)
+    exp = datetime.datetime(2000, 1, 1, tzinfo=datetime.UTC)
     payload = {"sub": "user@example.com", "exp": exp}
     token = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
     with pytest.raises(ExpiredSignatureError):
@@ -47,20 +92,13 @@ def test_expired_token() -> None:
 
 
 def test_invalid_signature() -> None:
-    data = {"sub": "user@example.com"}
-    token = create_access_token(data)
+    token = create_access_token({"sub": "user@example.com"})
     # Tamper with token
     tampered = token + "abc"
     with pytest.raises(JWTError):
         jwt.decode(tampered, SECRET_KEY, algorithms=[ALGORITHM])
 
 
-def test_token_missing_claims() -> None:
-    token = create_access_token({"foo": "bar"})
-    decoded = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    assert "sub" not in decoded
-
-
 BASIC_AUTH_USERNAME = "testuser"
 BASIC_AUTH_PASSWORD = join_parts("testpass")  # avoid S105/S106
 
@@ -0,0 +1,114 @@
+import time
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, cast
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import auth_cache as auth_cache_module
+from app.core.auth import create_access_token, get_current_user
+from app.core.auth_cache import AccessTokenCache
+from app.repositories.user_repository import UserRepository
+from tests.utils import join_parts, make_db_get
+
+if TYPE_CHECKING:  # pragma: no cover - used for typing only
+    from app.models.user import User
+
+
+def _user(uid: int = 1, email: str = "u@e.com") -> "User":
+    return cast("User", SimpleNamespace(id=uid, name="U", email=email))
+
+
+def test_get_returns_cached_user_id() -> None:
+    cache = AccessTokenCache(maxsize=10, ttl_seconds=60)
+    token = join_parts("tok")
+    cache.put(token, 1)
+    assert cache.get(token) == 1
+    assert cache.get(join_parts("other")) is None
+
+
+def test_entries_expire_after_ttl(monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = AccessTokenCache(maxsize=10, ttl_seconds=60)
+    token = join_parts("tok")
+    cache.put(token, 1)
+    now = time.monotonic()
+    monkeypatch.setattr(auth_cache_module.time, "monotonic", lambda: now + 61)
+    assert cache.get(token) is None
+    assert len(cache) == 0
+
+
+def test_entry_lifetime_capped_by_token_exp() -> None:
+    cache = AccessTokenCache(maxsize=10, ttl_seconds=60)
+    token = join_parts("tok")
+    cache.put(token, 1, token_exp=time.time() - 1)
+    assert cache.get(token) is None
+
+
+def test_disabled_cache_stores_nothing() -> None:
+    cache = AccessTokenCache(maxsize=10, ttl_seconds=0)
+    token = join_parts("tok")
+    cache.put(token, 1)
+    assert cache.get(token) is None
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    cache = AccessTokenCache(maxsize=2, ttl_seconds=60)
+    first, second, third = (join_parts("tok", str(i)) for i in range(3))
+    cache.put(first, 1)
+    cache.put(second, 2)
+    assert cache.get(first) is not None
+    cache.put(third, 3)
+    assert cache.get(second) is None
+    assert cache.get(first) is not None
+    assert cache.get(third) is not None
+
+
+def test_invalidate_user_drops_only_that_users_tokens() -> None:
+    cache = AccessTokenCache(maxsize=10, ttl_seconds=60)
+    mine, also_mine, theirs = (join_parts("tok", str(i)) for i in range(3))
+    cache.put(mine, 1)
+    cache.put(also_mine, 1)
+    cache.put(theirs, 2)
+    cache.invalidate_user(1)
+    assert cache.get(mine) is None
+    assert cache.get(also_mine) is None
+    assert cache.get(theirs) is not None
+    cache.invalidate_user(99)
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_get_current_user_skips_decode_but_reloads_user_on_hit(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    cache = AccessTokenCache(maxsize=10, ttl_seconds=60)
+    monkeypatch.setattr("app.core.auth.access_token_cache", cache)
+    token = create_access_token({"sub": "u@e.com", "uid": 7})
+    db_user = _user(7)
+    first = get_current_user(
+        token=token, user_repo=UserRepository(make_db_get(db_user))
+    )
+    assert first is db_user
+    assert cache.get(token) == 7
+
+    def _fail_decode(*_args: object, **_kwargs: object) -> None:
+        raise AssertionError
+
+    monkeypatch.setattr("app.core.auth.jwt.decode", _fail_decode)
+    db = make_db_get(db_user)
+    second = get_current_user(token=token, user_repo=UserRepository(db))
+    assert second is db_user
+    db.get.assert_called_once()
+
+
+def test_get_current_user_rejects_cached_token_of_deleted_user(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    cache = AccessTokenCache(maxsize=10, ttl_seconds=60)
+    monkeypatch.setattr("app.core.auth.access_token_cache", cache)
+    token = create_access_token({"sub": "u@e.com", "uid": 7})
+    get_current_user(token=token, user_repo=UserRepository(make_db_get(_user(7))))
+    with pytest.raises(HTTPException) as exc:
+        get_current_user(token=token, user_repo=UserRepository(make_db_get(None)))
+    assert exc.value.status_code == 401
+    assert cache.get(token) is None
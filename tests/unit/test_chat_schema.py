@@ -3,24 +3,17 @@ from pydantic import ValidationError
 
 from app.schemas.chat import ChatRequest
 
+_MAX_OK = "a" * 4096
+_TOO_LONG = "a" * 4097
 
-def test_chat_request_valid() -> None:
-    req = ChatRequest(message="Hello!")
-    assert req.message == "Hello!"
 
-
-def test_chat_request_empty() -> None:
-    with pytest.raises(ValidationError):
-        ChatRequest(message="   ")
+@pytest.mark.parametrize("message", ["Hello!", _MAX_OK])
+def test_chat_request_accepts(message: str) -> None:
+    req = ChatRequest(message=message)
+    assert req.message == message
 
 
-def test_chat_request_too_long() -> None:
+@pytest.mark.parametrize("message", ["   ", _TOO_LONG])
+def test_chat_request_rejects(message: str) -> None:
     with pytest.raises(ValidationError):
-        ChatRequest(message="a" * 4097)
-
-
-def test_chat_request_boundary_length_ok() -> None:
-    # 4096 should be accepted
-    msg = "a" * 4096
-    req = ChatRequest(message=msg)
-    assert req.message == msg
+        ChatRequest(message=message)
@@ -1,5 +1,4 @@
-from typing import Any
-from unittest.mock import Mock
+from types import SimpleNamespace
 
 import pytest
 from pydantic import ValidationError
@@ -7,22 +6,24 @@ from pydantic import ValidationError
 from app.schemas.chat import ChatRequest
 from app.services.chat_service import process_chat
 
+_TOO_LONG = "a" * 4097
+_USER = SimpleNamespace()
+
 
 @pytest.mark.parametrize(
     ("message", "expected_error"),
     [
         ("Hello!", None),
         ("   ", "empty"),
-        ("a" * 4097, "too long"),
+        (_TOO_LONG, "too long"),
     ],
 )
 def test_process_chat_cases(message: str, expected_error: str | None) -> None:
-    user: Any = Mock()
     if expected_error:
         with pytest.raises(ValidationError) as exc:
             ChatRequest(message=message)
         assert expected_error in str(exc.value)
     else:
         req = ChatRequest(message=message)
-        resp = process_chat(req, user)
+        resp = process_chat(req, _USER)
         assert "Hello" in resp.response or "help" in resp.response
@@ -1,5 +1,6 @@
 import time
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
 
 import pytest
 from fastapi import HTTPException, status
@@ -13,36 +14,49 @@ from app.core.auth import (
     create_access_token,
     create_refresh_token,
     get_current_user,
+    hash_refresh_token,
 )
+from app.core.auth_cache import AccessTokenCache
 from app.core.config import settings
-from tests.utils import join_parts, make_db_query_first, make_dummy_db
-
-
-def test_create_access_token_extra_keys() -> None:
-    data = {"sub": "extra@example.com", "foo": "bar"}
+from app.repositories.user_repository import UserRepository
+from tests.utils import join_parts, make_db_get, make_dummy_db
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"sub": "test@example.com"},
+        {"sub": "extra@example.com", "foo": "bar"},
+        {"sub": "cover@example.com", "foo": "bar", "baz": 123},
+        {"foo": "bar"},
+        {},
+    ],
+)
+def test_create_access_token_payloads(data: dict[str, object]) -> None:
     token = create_access_token(data)
     payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    assert payload["sub"] == "extra@example.com"
-    assert payload["foo"] == "bar"
-    assert "exp" in payload
-
-
-def test_create_access_token_minimal() -> None:
-    token = create_access_token({"sub": "test@example.com"})
-    assert isinstance(token, str)
-
+    assert {k: payload.get(k) for k in data} == data
+    assert payload.get("sub") == data.get("sub")
+    # Expiry should be in the future
+    assert payload["exp"] > time.time()
 
-def test_create_access_token_no_sub() -> None:
-    token = create_access_token({})
-    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    assert "exp" in payload
-    assert payload.get("sub") is None
 
+def test_jwt_key_is_not_rebuilt_per_token(monkeypatch: pytest.MonkeyPatch) -> None:
+    def fail_construct(*_args: object, **_kwargs: object) -> None:
+        msg = "key rebuilt"
+        raise AssertionError(msg)
 
-def test_create_access_token_empty_dict() -> None:
-    token = create_access_token({})
-    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    assert "exp" in payload
+    monkeypatch.setattr("jose.jws.jwk.construct", fail_construct)
+    monkeypatch.setattr(
+        "app.core.auth.access_token_cache", AccessTokenCache(maxsize=0, ttl_seconds=0)
+    )
+    token = create_access_token({"sub": "k@example.com", "uid": 5})
+    user = SimpleNamespace(id=5, name="K", email="k@example.com")
+    resolved = get_current_user(
+        token=token,
+        user_repo=UserRepository(make_db_get(user)),
+    )
+    assert resolved is user
 
 
 def test_get_current_user_invalid_token(monkeypatch: pytest.MonkeyPatch) -> None:
@@ -55,7 +69,9 @@ def test_get_current_user_invalid_token(monkeypatch: pytest.MonkeyPatch) -> None
 
     monkeypatch.setattr("app.core.auth.jwt.decode", bad_decode)
     with pytest.raises(HTTPException) as exc:
-        get_current_user(token=join_parts("bad-token"), db=make_dummy_db())
+        get_current_user(
+            token=join_parts("bad-token"), user_repo=UserRepository(make_dummy_db())
+        )
     assert exc.value.status_code == status.HTTP_401_UNAUTHORIZED
     assert "Authentication required" in exc.value.detail
 
@@ -66,7 +82,9 @@ def test_get_current_user_missing_uid(monkeypatch: pytest.MonkeyPatch) -> None:
 
     monkeypatch.setattr("app.core.auth.jwt.decode", decode)
     with pytest.raises(HTTPException) as exc:
-        get_current_user(token=join_parts("tok"), db=make_dummy_db())
+        get_current_user(
+            token=join_parts("tok"), user_repo=UserRepository(make_dummy_db())
+        )
     assert exc.value.status_code == status.HTTP_401_UNAUTHORIZED
     assert "Authentication required" in exc.value.detail
 
@@ -76,46 +94,32 @@ def test_get_current_user_user_none(monkeypatch: pytest.MonkeyPatch) -> None:
         return {"uid": 123}
 
     monkeypatch.setattr("app.core.auth.jwt.decode", decode)
-    db = make_db_query_first(None)
+    db = make_db_get(None)
     with pytest.raises(HTTPException) as exc:
-        get_current_user(token=join_parts("tok"), db=db)
+        get_current_user(token=join_parts("tok"), user_repo=UserRepository(db))
     assert exc.value.status_code == status.HTTP_401_UNAUTHORIZED
     assert "Authentication required" in exc.value.detail
 
 
-def test_create_access_token_decodes_and_has_exp() -> None:
-    data = {"sub": "foo@example.com"}
-    token = create_access_token(data)
-    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    assert payload["sub"] == "foo@example.com"
-    assert "exp" in payload
-    # Expiry should be in the future
-    assert payload["exp"] > time.time()
-
-
-def test_create_access_token_copy_update_logic() -> None:
-    data = {"sub": "cover@example.com", "foo": "bar", "baz": 123}
-    token = create_access_token(data)
-    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    assert payload["sub"] == "cover@example.com"
-    assert payload["foo"] == "bar"
-    assert payload["baz"] == 123
-    assert "exp" in payload
-
-
 def test_create_refresh_token_properties() -> None:
+    lifetime = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    before = datetime.now(UTC)
     token, expire = create_refresh_token()
+    after = datetime.now(UTC)
     # basic shape
     assert isinstance(token, str)
-    # token_urlsafe(64) yields a fairly long base64url string
-    assert len(token) >= 20
-    # expiry should be timezone-aware and roughly REFRESH_TOKEN_EXPIRE_DAYS from now
+    # 32 random bytes encode to 43 base64url characters
+    assert len(token) == 43
+    # expiry is timezone-aware and exactly the configured lifetime from the call
     assert expire.tzinfo is not None
-    now = datetime.now(UTC)
-    delta_seconds = (expire - now).total_seconds()
-    days = settings.REFRESH_TOKEN_EXPIRE_DAYS
-    # Use a generous window to avoid flakiness on slow CI
-    assert (days - 1) * 86400 <= delta_seconds <= (days + 1) * 86400
+    assert before + lifetime <= expire <= after + lifetime
+
+
+def test_hash_refresh_token_is_fixed_width_sha256() -> None:
+    digest = hash_refresh_token(join_parts("tok"))
+    assert len(digest) == 32
+    assert digest == hash_refresh_token(join_parts("tok"))
+    assert digest != hash_refresh_token(join_parts("tok2"))
 
 
 def test_basic_auth_guard_success() -> None:
@@ -123,21 +127,3 @@ def test_basic_auth_guard_success() -> None:
     creds = HTTPBasicCredentials(username="user", password=join_parts("pass"))
     # Should not raise
     guard(creds)
-
-
-def test_basic_auth_guard_fail_username() -> None:
-    guard = basic_auth_guard("user", join_parts("pass"))
-    creds = HTTPBasicCredentials(username="wrong", password=join_parts("pass"))
-    with pytest.raises(HTTPException) as exc:
-        guard(creds)
-    assert exc.value.status_code == 401
-    assert "Invalid credentials" in exc.value.detail
-
-
-def test_basic_auth_guard_fail_password() -> None:
-    guard = basic_auth_guard("user", join_parts("pass"))
-    creds = HTTPBasicCredentials(username="user", password=join_parts("wr", "ong"))
-    with pytest.raises(HTTPException) as exc:
-        guard(creds)
-    assert exc.value.status_code == 401
-    assert "Invalid credentials" in exc.value.detail
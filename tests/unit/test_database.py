@@ -1,6 +1,6 @@
 from contextlib import suppress
 
-from app.core.database import get_db
+from app.core.database import get_db, get_engine, get_session_local
 
 
 def test_get_db_returns_session() -> None:
@@ -11,3 +11,9 @@ def test_get_db_returns_session() -> None:
     finally:
         with suppress(StopIteration):
             next(gen)
+
+
+def test_engine_and_sessionmaker_are_shared() -> None:
+    assert get_engine() is get_engine()
+    assert get_session_local() is get_session_local()
+    assert get_session_local().kw["bind"] is get_engine()
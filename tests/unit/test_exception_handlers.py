@@ -20,95 +20,99 @@ from app.core.exceptions import (
     LogoutOperationError,
 )
 
-pytestmark = pytest.mark.asyncio
+# Handlers only read the request for the log path, so one stub serves every test
+_REQ: Any = MagicMock()
 
 
-@pytest.mark.asyncio
-async def test_email_already_registered_handler_returns_409() -> None:
-    req = MagicMock()
-    exc = EmailAlreadyRegisteredError("Email exists!")
-    response = await email_already_registered_handler(req, exc)
-    assert response.status_code == 409
-    body = bytes(response.body).decode()
-    assert "Email exists!" in body
-    assert '"code"' in body
-
-
-async def test_invalid_credentials_handler_returns_401_and_clears_cookie() -> None:
-    req = MagicMock()
-    exc = InvalidCredentialsError("Bad creds!")
-    response = await invalid_credentials_handler(req, exc)
-    assert response.status_code == 401
-    body = bytes(response.body).decode()
-    assert "Bad creds!" in body
-    assert '"code"' in body
+@pytest.mark.parametrize(
+    ("handler", "exc", "expected_status", "expected_fragment", "clears_cookie"),
+    [
+        (
+            email_already_registered_handler,
+            EmailAlreadyRegisteredError("Email exists!"),
+            409,
+            b"Email exists!",
+            False,
+        ),
+        (
+            invalid_credentials_handler,
+            InvalidCredentialsError("Bad creds!"),
+            401,
+            b"Bad creds!",
+            True,
+        ),
+        (
+            http_exception_handler,
+            Exception("boom"),
+            500,
+            b"Internal server error",
+            False,
+        ),
+        (
+            unhandled_exception_handler,
+            RuntimeError("boom"),
+            500,
+            b"Internal server error",
+            False,
+        ),
+        (
+            unhandled_exception_handler,
+            Exception("Unexpected!"),
+            500,
+            b"Internal server error",
+            False,
+        ),
+        # A non-standard status (not in http.HTTPStatus) has no default phrase,
+        # so the detail must be kept in the body.
+        (
+            http_exception_handler,
+            HTTPException(status_code=599, detail="Upstream timeout"),
+            599,
+            b"Upstream timeout",
+            False,
+        ),
+    ],
+)
+async def test_json_error_handlers(
+    handler: Callable[..., Any],
+    exc: Exception,
+    expected_status: int,
+    expected_fragment: bytes,
+    clears_cookie: bool,
+) -> None:
+    response = await handler(_REQ, exc)
+    assert response.status_code == expected_status
+    body = bytes(response.body)
+    assert expected_fragment in body
+    assert b'"code"' in body
     set_cookie = response.headers.get("set-cookie", "").lower()
-    assert "refresh_token=" in set_cookie
-    assert "max-age=0" in set_cookie
+    assert ("refresh_token=" in set_cookie) is clears_cookie
+    if clears_cookie:
+        assert "max-age=0" in set_cookie
 
 
-@pytest.mark.asyncio
 async def test_http_exception_handler_preserves_status_and_headers() -> None:
-    req = MagicMock()
     exc = HTTPException(status_code=418, detail="I'm a teapot", headers={"X-Test": "1"})
-    response = await http_exception_handler(req, exc)
+    response = await http_exception_handler(_REQ, exc)
     assert response.status_code == 418
-    body = bytes(response.body).decode()
-    assert "teapot" in body
+    body = bytes(response.body)
+    assert b"teapot" in body
     assert response.headers.get("X-Test") == "1"
-    assert '"code"' in body
+    assert b'"code"' in body
 
 
-@pytest.mark.asyncio
-async def test_http_exception_handler_non_http_fallback() -> None:
-    req = MagicMock()
-    response = await http_exception_handler(req, Exception("boom"))
-    assert response.status_code == 500
-    body = bytes(response.body).decode()
-    assert "Internal server error" in body
-    assert '"code"' in body
-
-
-@pytest.mark.asyncio
-async def test_unhandled_exception_handler_returns_500() -> None:
-    req = MagicMock()
-    response = await unhandled_exception_handler(req, RuntimeError("boom"))
-    assert response.status_code == 500
-    body = bytes(response.body).decode()
-    assert "Internal server error" in body
-    assert '"code"' in body
-
-
-@pytest.mark.asyncio
 async def test_http_exception_handler_without_detail_returns_code_only() -> None:
-    req = MagicMock()
     exc = HTTPException(
         status_code=401, detail=None, headers={"WWW-Authenticate": "Bearer"}
     )
-    response = await http_exception_handler(req, exc)
+    response = await http_exception_handler(_REQ, exc)
     assert response.status_code == 401
-    body = bytes(response.body).decode()
-    assert '"code"' in body
-    assert '"detail"' not in body
+    body = bytes(response.body)
+    assert b'"code"' in body
+    assert b'"detail"' not in body
     assert response.headers.get("WWW-Authenticate") == "Bearer"
 
 
-@pytest.mark.asyncio
-async def test_http_exception_handler_unknown_status_includes_detail() -> None:
-    # Use a non-standard HTTP status (not in http.HTTPStatus) to trigger
-    # the ValueError path in _is_default_http_detail and ensure that
-    # the detail is included in the JSON response.
-    req = MagicMock()
-    exc = HTTPException(status_code=599, detail="Upstream timeout")
-    response = await http_exception_handler(req, exc)
-    assert response.status_code == 599
-    body = bytes(response.body).decode()
-    assert '"code"' in body
-    assert '"detail"' in body
-    assert "Upstream timeout" in body
-
-
-@pytest.mark.asyncio
 @pytest.mark.parametrize(
     "handler_exc",
     [
@@ -120,20 +124,10 @@ async def test_logout_variants_return_204_and_clear_cookie(
     handler_exc: tuple[Callable[..., Any], Exception],
 ) -> None:
     handler, exc = handler_exc
-    req = MagicMock()
-    response = await handler(req, exc)
+    response = await handler(_REQ, exc)
     assert response.status_code == 204
     # Starlette's delete_cookie sets a Set-Cookie header with max-age=0
     # on the Response; ensure the refresh cookie is being cleared.
     set_cookie = response.headers.get("set-cookie", "")
     assert "refresh_token=" in set_cookie.lower()
     assert "max-age=0" in set_cookie.lower()
-
-
-async def test_unhandled_exception_handler_returns_500_for_generic_error() -> None:
-    req = MagicMock()
-    response = await unhandled_exception_handler(req, Exception("Unexpected!"))
-    assert response.status_code == 500
-    body = bytes(response.body).decode()
-    assert "Internal server error" in body
-    assert '"code"' in body
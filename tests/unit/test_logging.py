@@ -1,6 +1,12 @@
+import json
+import logging
+import threading
+from collections import UserString
 from types import SimpleNamespace
 
-from app.core.logging import mask_token
+import pytest
+
+from app.core.logging import audit_logger, flush_audit_log, mask_token
 
 
 def test_mask_token_none() -> None:
@@ -24,3 +30,41 @@ def test_mask_token_non_sized_returns_stars() -> None:
 
     obj = SimpleNamespace(__len__=_len_raises)
     assert mask_token(obj) == "***"
+
+
+def test_mask_token_bytes_is_decoded() -> None:
+    assert mask_token(b"abcdefghijklmnop") == "abcd...mnop"
+
+
+def test_mask_token_non_str_sized_object() -> None:
+    assert mask_token(UserString("abcdefghijklmnop")) == "abcd...mnop"
+
+
+def test_mask_token_short_non_str_object() -> None:
+    assert mask_token(UserString("abc")) == "***"
+
+
+class _ThreadRecordingHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.emitted: list[tuple[str, int]] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.emitted.append((record.getMessage(), threading.get_ident()))
+
+
+def test_audit_records_are_written_off_the_calling_thread(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    caplog.set_level(logging.INFO)
+    handler = _ThreadRecordingHandler()
+    root = logging.getLogger()
+    root.addHandler(handler)
+    try:
+        audit_logger.info("AuditProbe", marker=1)
+        flush_audit_log()
+    finally:
+        root.removeHandler(handler)
+    (message, thread_id) = handler.emitted[-1]
+    assert json.loads(message)["marker"] == 1
+    assert thread_id != threading.get_ident()
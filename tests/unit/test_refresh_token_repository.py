@@ -1,8 +1,16 @@
 from datetime import UTC, datetime
+from types import SimpleNamespace
 from unittest.mock import MagicMock
 
+from sqlalchemy.dialects import postgresql
+
+from app.core.auth import hash_refresh_token
 from app.models.refresh_token import RefreshToken
-from app.repositories.refresh_token_repository import RefreshTokenRepository
+from app.repositories.refresh_token_repository import (
+    RefreshTokenRepository,
+    RevokedRefreshToken,
+    get_refresh_token_repository,
+)
 from tests.utils import (
     join_parts,
     make_db_commit_mock,
@@ -13,14 +21,44 @@ from tests.utils import (
 
 def test_add_token_naive_datetime() -> None:
     db = make_db_commit_mock()
+    db.execute.return_value.scalar_one_or_none.return_value = 1
     repo = RefreshTokenRepository(db)
     naive_dt = datetime.now(UTC).replace(tzinfo=None)
-    repo.add_token(1, join_parts("token"), naive_dt)
-    db.add.assert_called_once()
+    assert repo.add_token(1, join_parts("token"), naive_dt) is True
+    db.add.assert_not_called()
     db.assert_committed_once()
-    added_obj = db.add.call_args[0][0]
-    assert isinstance(added_obj, RefreshToken)
-    assert added_obj.expires_at.tzinfo is not None
+    stmt = db.execute.call_args[0][0]
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    assert "ON CONFLICT (token_hash) DO NOTHING" in str(compiled)
+    assert compiled.params["token_hash"] == hash_refresh_token(join_parts("token"))
+    assert compiled.params["expires_at"].tzinfo is not None
+
+
+def test_add_token_conflict_returns_false() -> None:
+    db = make_db_commit_mock()
+    db.execute.return_value.scalar_one_or_none.return_value = None
+    repo = RefreshTokenRepository(db)
+    assert repo.add_token(1, join_parts("token"), datetime.now(UTC)) is False
+    db.commit.assert_not_called()
+
+
+def test_add_token_can_defer_commit() -> None:
+    db = make_db_commit_mock()
+    db.execute.return_value.scalar_one_or_none.return_value = 1
+    repo = RefreshTokenRepository(db)
+    assert repo.add_token(1, join_parts("token"), datetime.now(UTC), commit=False)
+    db.commit.assert_not_called()
+
+
+def test_rollback_discards_pending_writes() -> None:
+    db = make_db_commit_mock()
+    RefreshTokenRepository(db).rollback()
+    db.rollback.assert_called_once()
+
+
+def test_get_refresh_token_repository_binds_session() -> None:
+    db = MagicMock()
+    assert get_refresh_token_repository(db).db is db
 
 
 def test_get_valid_token_none() -> None:
@@ -39,7 +77,7 @@ def test_get_valid_token_found() -> None:
     token_obj = RefreshToken(
         id=1,
         user_id=2,
-        token=join_parts("tok-123"),
+        token_hash=hash_refresh_token(join_parts("tok-123")),
         expires_at=None,
         revoked=False,
         created_at=None,
@@ -54,7 +92,7 @@ def test_get_valid_tokens_found() -> None:
     token_obj1 = RefreshToken(
         id=1,
         user_id=2,
-        token=join_parts("tok-123"),
+        token_hash=hash_refresh_token(join_parts("tok-123")),
         expires_at=None,
         revoked=False,
         created_at=None,
@@ -62,7 +100,7 @@ def test_get_valid_tokens_found() -> None:
     token_obj2 = RefreshToken(
         id=2,
         user_id=2,
-        token=join_parts("tok-456"),
+        token_hash=hash_refresh_token(join_parts("tok-456")),
         expires_at=None,
         revoked=False,
         created_at=None,
@@ -75,29 +113,96 @@ def test_get_valid_tokens_found() -> None:
 
 def test_revoke_token_updates_and_commits() -> None:
     db = make_db_commit_mock()
-    query_mock = MagicMock()
-    filter_mock = MagicMock()
-    query_mock.filter.return_value = filter_mock
-    db.query.return_value = query_mock
 
     repo = RefreshTokenRepository(db)
     repo.revoke_token(join_parts("t-123"))
 
-    db.query.assert_called_once_with(RefreshToken)
-    filter_mock.update.assert_called_once_with({"revoked": True})
+    db.query.assert_not_called()
+    stmt = db.execute.call_args[0][0]
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE refresh_tokens SET revoked=")
+    assert "refresh_tokens.token_hash = " in sql
+    assert "NOT refresh_tokens.revoked" in sql
     db.assert_committed_once()
 
 
 def test_revoke_all_tokens_updates_and_commits() -> None:
     db = make_db_commit_mock()
-    query_mock = MagicMock()
-    filter_mock = MagicMock()
-    query_mock.filter.return_value = filter_mock
-    db.query.return_value = query_mock
 
     repo = RefreshTokenRepository(db)
     repo.revoke_all_tokens(42)
 
-    db.query.assert_called_once_with(RefreshToken)
-    filter_mock.update.assert_called_once_with({"revoked": True})
+    db.query.assert_not_called()
+    stmt = db.execute.call_args[0][0]
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    assert str(compiled).startswith("UPDATE refresh_tokens SET revoked=")
+    assert "NOT refresh_tokens.revoked" in str(compiled)
+    assert "IS false" not in str(compiled)
+    assert compiled.params["user_id_1"] == 42
     db.assert_committed_once()
+
+
+def test_revoke_and_return_is_one_atomic_update() -> None:
+    db = make_db_commit_mock()
+    now = datetime.now(UTC)
+    db.execute.return_value.one_or_none.return_value = SimpleNamespace(
+        _asdict=lambda: {
+            "id": 1,
+            "user_id": 42,
+            "created_at": now,
+            "expires_at": now,
+            "user_agent": "ua",
+            "ip_address": None,
+        }
+    )
+    repo = RefreshTokenRepository(db)
+    row = repo.revoke_and_return(join_parts("t-1"), user_id=42, active_at=now)
+
+    assert row == RevokedRefreshToken(
+        id=1,
+        user_id=42,
+        created_at=now,
+        expires_at=now,
+        user_agent="ua",
+        ip_address=None,
+    )
+    db.query.assert_not_called()
+    stmt = db.execute.call_args[0][0]
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    assert sql.startswith("UPDATE refresh_tokens SET revoked=")
+    assert "NOT refresh_tokens.revoked" in sql
+    assert "refresh_tokens.expires_at >= " in sql
+    assert "RETURNING refresh_tokens.id, refresh_tokens.user_id" in sql
+    assert compiled.params["user_id_1"] == 42
+    db.assert_committed_once()
+
+
+def test_revoke_and_return_no_match_returns_none() -> None:
+    db = make_db_commit_mock()
+    db.execute.return_value.one_or_none.return_value = None
+    repo = RefreshTokenRepository(db)
+    assert repo.revoke_and_return(join_parts("t-1")) is None
+    sql = str(db.execute.call_args[0][0].compile(dialect=postgresql.dialect()))
+    where_clause = sql.split("WHERE")[1].split("RETURNING")[0]
+    assert "user_id" not in where_clause
+    assert "expires_at" not in where_clause
+    db.assert_committed_once()
+
+
+def test_get_token_ignores_revoked_state() -> None:
+    token_obj = RefreshToken(
+        id=1, user_id=2, token_hash=hash_refresh_token(join_parts("t")), revoked=True
+    )
+    db = make_db_query_first(token_obj)
+    repo = RefreshTokenRepository(db)
+    assert repo.get_token(join_parts("t")) is token_obj
+
+
+def test_revoke_and_return_can_defer_commit() -> None:
+    db = make_db_commit_mock()
+    db.execute.return_value.one_or_none.return_value = None
+    repo = RefreshTokenRepository(db)
+    assert repo.revoke_and_return(join_parts("t-1"), commit=False) is None
+    db.execute.assert_called_once()
+    db.commit.assert_not_called()
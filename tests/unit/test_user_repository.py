@@ -1,8 +1,15 @@
+from typing import TYPE_CHECKING, cast
 from unittest.mock import MagicMock
 
+import pytest
+
+from app.core.auth_cache import AccessTokenCache
 from app.models.user import User
-from app.repositories.user_repository import UserRepository
-from tests.utils import join_parts
+from app.repositories.user_repository import UserRepository, get_user_repository
+from tests.utils import join_parts, make_db_get
+
+if TYPE_CHECKING:  # pragma: no cover - used for typing only
+    from sqlalchemy.orm import Session
 
 
 def test_user_repository_init() -> None:
@@ -11,29 +18,63 @@ def test_user_repository_init() -> None:
     assert repo.db is db
 
 
-def make_db_with_users(users: list[User] | None = None) -> MagicMock:
-    db: MagicMock = MagicMock()
-    db.users = users or []
+def test_get_user_repository_binds_session() -> None:
+    db = MagicMock()
+    assert get_user_repository(db).db is db
+
+
+def test_get_by_id_uses_identity_map_lookup() -> None:
+    user = User(
+        id=1, name="Test", email="t@example.com", hashed_password=join_parts("x")
+    )
+    db = make_db_get(user)
+    assert UserRepository(db).get_by_id(1) is user
+    db.get.assert_called_once_with(User, 1)
+    db.query.assert_not_called()
+
+
+class _FirstResult:
+    __slots__ = ("_result",)
+
+    def __init__(self, result: User | None) -> None:
+        self._result = result
+
+    def first(self) -> User | None:
+        return self._result
+
+
+class _EmailQuery:
+    __slots__ = ("_users",)
+
+    def __init__(self, users: list[User]) -> None:
+        self._users = users
+
+    def filter(self, cond: object) -> _FirstResult:
+        # Simulate SQLAlchemy == comparator with .right.value
+        email = getattr(getattr(cond, "right", None), "value", None)
+        return _FirstResult(next((u for u in self._users if u.email == email), None))
+
+
+class FakeUserDB:
+    """In-memory stand-in for the ``Session`` calls ``UserRepository`` makes."""
+
+    __slots__ = ("committed", "users")
 
-    def query(_model: object) -> MagicMock:
-        query_mock: MagicMock = MagicMock()
+    def __init__(self, users: list[User] | None = None) -> None:
+        self.users = users or []
+        self.committed = False
 
-        def _filter(cond: object) -> MagicMock:
-            # Simulate SQLAlchemy == comparator with .right.value
-            email = getattr(getattr(cond, "right", object()), "value", None)
-            result = next((u for u in db.users if u.email == email), None)
-            first_mock: MagicMock = MagicMock(return_value=result)
-            return MagicMock(first=first_mock)
+    def query(self, _model: object) -> _EmailQuery:
+        return _EmailQuery(self.users)
 
-        query_mock.filter.side_effect = _filter
-        return query_mock
+    def add(self, user: User) -> None:
+        self.users.append(user)
 
-    db.query.side_effect = query
-    db.add.side_effect = lambda _user: db.users.append(_user)
-    db.commit.side_effect = lambda: setattr(db, "committed", True)
-    db.refresh.side_effect = lambda _user: None
-    db.committed = False
-    return db
+    def commit(self) -> None:
+        self.committed = True
+
+    def refresh(self, _user: User) -> None:
+        pass
 
 
 def test_get_by_email_found() -> None:
@@ -43,22 +84,22 @@ def test_get_by_email_found() -> None:
         email="test@example.com",
         hashed_password=join_parts("x"),
     )
-    db = make_db_with_users([user])
-    repo = UserRepository(db)
+    db = FakeUserDB([user])
+    repo = UserRepository(cast("Session", db))
     result = repo.get_by_email("test@example.com")
     assert result is user
 
 
 def test_get_by_email_not_found() -> None:
-    db = make_db_with_users([])
-    repo = UserRepository(db)
+    db = FakeUserDB([])
+    repo = UserRepository(cast("Session", db))
     result = repo.get_by_email("notfound@example.com")
     assert result is None
 
 
 def test_create_user() -> None:
-    db = make_db_with_users([])
-    repo = UserRepository(db)
+    db = FakeUserDB([])
+    repo = UserRepository(cast("Session", db))
     user = repo.create(
         name="Test",
         email="test@example.com",
@@ -71,20 +112,18 @@ def test_create_user() -> None:
     assert user.hashed_password == join_parts("x")
 
 
-def test_update_password_user_found() -> None:
-    # Build a DB fake where query().filter().first() returns our user
+def test_update_password_user_found(monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = AccessTokenCache(maxsize=10, ttl_seconds=60)
+    cache.put(join_parts("tok"), 1)
+    monkeypatch.setattr("app.repositories.user_repository.access_token_cache", cache)
+    # Build a DB fake where get(User, pk) returns our user
     user = User(
         id=1,
         name="Alice",
         email="a@example.com",
         hashed_password=join_parts("old"),
     )
-    db = MagicMock()
-    query_mock = MagicMock()
-    filter_mock = MagicMock()
-    filter_mock.first.return_value = user
-    query_mock.filter.return_value = filter_mock
-    db.query.return_value = query_mock
+    db = make_db_get(user)
 
     db.add = MagicMock()
     db.commit = MagicMock()
@@ -95,16 +134,12 @@ def test_update_password_user_found() -> None:
     assert user.hashed_password == join_parts("new")
     db.add.assert_called_once_with(user)
     db.commit.assert_called_once()
+    assert cache.get(join_parts("tok")) is None
 
 
 def test_update_password_user_not_found() -> None:
     # Build a DB fake where no user is found by id
-    db = MagicMock()
-    query_mock = MagicMock()
-    filter_mock = MagicMock()
-    filter_mock.first.return_value = None
-    query_mock.filter.return_value = filter_mock
-    db.query.return_value = query_mock
+    db = make_db_get(None)
 
     db.add = MagicMock()
     db.commit = MagicMock()
@@ -114,3 +149,31 @@ def test_update_password_user_not_found() -> None:
 
     db.add.assert_not_called()
     db.commit.assert_not_called()
+
+
+def test_delete_removes_user_tokens_and_cache_entries(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    cache = AccessTokenCache(maxsize=10, ttl_seconds=60)
+    cache.put(join_parts("tok"), 1)
+    monkeypatch.setattr("app.repositories.user_repository.access_token_cache", cache)
+    user = User(
+        id=1, name="Alice", email="a@example.com", hashed_password=join_parts("x")
+    )
+    db = make_db_get(user)
+
+    assert UserRepository(db).delete(1) is True
+
+    db.query.return_value.filter.return_value.delete.assert_called_once_with()
+    db.delete.assert_called_once_with(user)
+    db.commit.assert_called_once()
+    assert cache.get(join_parts("tok")) is None
+
+
+def test_delete_user_not_found() -> None:
+    db = make_db_get(None)
+
+    assert UserRepository(db).delete(999) is False
+
+    db.delete.assert_not_called()
+    db.commit.assert_not_called()
@@ -1,22 +1,23 @@
+import json
 from datetime import UTC, datetime, timedelta
 from types import SimpleNamespace
-from typing import TYPE_CHECKING, cast
-from unittest.mock import MagicMock, patch
+from typing import TYPE_CHECKING, Any, cast
+from unittest.mock import ANY, MagicMock, patch
 
 import pytest
 from jose import jwt
 from sqlalchemy.exc import SQLAlchemyError
 
 import app.core.config as cfg
-from app.core.auth import ALGORITHM, SECRET_KEY, hash_password
+from app.core.auth import ALGORITHM, SECRET_KEY
 from app.core.exceptions import (
     InvalidCredentialsError,
     LogoutNoSessionError,
     LogoutOperationError,
 )
-
-if TYPE_CHECKING:  # pragma: no cover - used for typing only
-    from app.models.user import User
+from app.core.logging import flush_audit_log
+from app.repositories.refresh_token_repository import RefreshTokenRepository
+from app.services import user_service
 from app.services.user_service import (
     EmailAlreadyRegisteredError,
     authenticate_user,
@@ -26,7 +27,19 @@ from app.services.user_service import (
     register_user,
     rotate_refresh_token,
 )
-from tests.utils import PasswordKind, build_password, join_parts, make_dummy_db
+from tests.utils import PasswordKind, build_password, join_parts, make_db_commit_mock
+
+if TYPE_CHECKING:  # pragma: no cover - used for typing only
+    from app.models.user import User
+
+
+def _audit_records(caplog: pytest.LogCaptureFixture) -> list[dict[str, Any]]:
+    flush_audit_log()
+    return [
+        json.loads(rec.getMessage())
+        for rec in caplog.records
+        if '"RefreshTokenAudit"' in rec.getMessage()
+    ]
 
 
 # ---------- access token helper ----------
@@ -40,59 +53,48 @@ def test_issue_access_token_includes_uid_and_sub() -> None:
 
 
 # ---------- authenticate_user ----------
-def test_authenticate_user_success() -> None:
+def test_authenticate_user_success(known_hash: str) -> None:
     email = "test@example.com"
     password = build_password(PasswordKind.VALID)
-    db_user = MagicMock(email=email, hashed_password=hash_password(password), id=1)
+    db_user = MagicMock(email=email, hashed_password=known_hash, id=1)
     repo_mock = MagicMock(get_by_email=MagicMock(return_value=db_user))
     token_repo_mock = MagicMock()
-    with (
-        patch("app.services.user_service.UserRepository", return_value=repo_mock),
-        patch(
-            "app.services.user_service.RefreshTokenRepository",
-            return_value=token_repo_mock,
-        ),
-    ):
-        access_token, refresh_token = authenticate_user(
-            email,
-            password,
-            make_dummy_db(),
-            user_agent="ua",
-            ip_address="1.2.3.4",
-        )
-    assert isinstance(access_token, str)
-    assert access_token
-    assert isinstance(refresh_token, str)
-    assert refresh_token
+    tokens = authenticate_user(
+        email,
+        password,
+        repo_mock,
+        token_repo_mock,
+        user_agent="ua",
+        ip_address="1.2.3.4",
+    )
+    assert isinstance(tokens.access_token, str)
+    assert tokens.access_token
+    assert isinstance(tokens.refresh_token, str)
+    assert tokens.refresh_token
     token_repo_mock.add_token.assert_called_once()
 
 
 def test_authenticate_user_triggers_rehash_on_verify(
     monkeypatch: pytest.MonkeyPatch,
+    cheap_hash: str,
 ) -> None:
     email = "rehash@example.com"
     password = build_password(PasswordKind.VALID)
-    db_user = MagicMock(email=email, hashed_password=hash_password(password), id=42)
+    db_user = MagicMock(email=email, hashed_password=cheap_hash, id=42)
     repo_mock = MagicMock(get_by_email=MagicMock(return_value=db_user))
     token_repo_mock = MagicMock()
     # Force needs_rehash to return True so the helper runs
     monkeypatch.setattr("app.services.user_service.needs_rehash", lambda _h: True)
-    with (
-        patch("app.services.user_service.UserRepository", return_value=repo_mock),
-        patch(
-            "app.services.user_service.RefreshTokenRepository",
-            return_value=token_repo_mock,
-        ),
-    ):
-        access_token, refresh_token = authenticate_user(
-            email,
-            password,
-            make_dummy_db(),
-            user_agent="ua",
-            ip_address="127.0.0.1",
-        )
-    assert access_token
-    assert refresh_token
+    tokens = authenticate_user(
+        email,
+        password,
+        repo_mock,
+        token_repo_mock,
+        user_agent="ua",
+        ip_address="127.0.0.1",
+    )
+    assert tokens.access_token
+    assert tokens.refresh_token
     # Ensure rehash persisted
     assert repo_mock.update_password.called
     args, _ = repo_mock.update_password.call_args
@@ -103,64 +105,74 @@ def test_authenticate_user_triggers_rehash_on_verify(
 
 def test_authenticate_user_rehash_failure_does_not_block_login(
     monkeypatch: pytest.MonkeyPatch,
+    cheap_hash: str,
 ) -> None:
     email = "rehash-fail@example.com"
     password = build_password(PasswordKind.VALID)
-    db_user = MagicMock(email=email, hashed_password=hash_password(password), id=7)
+    db_user = MagicMock(email=email, hashed_password=cheap_hash, id=7)
     repo_mock = MagicMock(
         get_by_email=MagicMock(return_value=db_user),
         update_password=MagicMock(side_effect=SQLAlchemyError("db write failed")),
     )
     token_repo_mock = MagicMock()
     monkeypatch.setattr("app.services.user_service.needs_rehash", lambda _h: True)
-    with (
-        patch("app.services.user_service.UserRepository", return_value=repo_mock),
-        patch(
-            "app.services.user_service.RefreshTokenRepository",
-            return_value=token_repo_mock,
-        ),
-    ):
-        # Should still succeed even if update_password raises
-        access_token, refresh_token = authenticate_user(
-            email,
-            password,
-            make_dummy_db(),
-        )
-    assert isinstance(access_token, str)
-    assert isinstance(refresh_token, str)
+    # Should still succeed even if update_password raises
+    tokens = authenticate_user(
+        email,
+        password,
+        repo_mock,
+        token_repo_mock,
+    )
+    assert isinstance(tokens.access_token, str)
+    assert isinstance(tokens.refresh_token, str)
 
 
-def test_authenticate_user_wrong_password() -> None:
+def test_authenticate_user_wrong_password(cheap_hash: str) -> None:
     email = "test@example.com"
     repo_mock = MagicMock(
         get_by_email=MagicMock(
             return_value=MagicMock(
                 email=email,
-                hashed_password=hash_password(build_password(PasswordKind.VALID)),
+                hashed_password=cheap_hash,
                 id=1,
             ),
         ),
     )
-    with (
-        patch("app.services.user_service.UserRepository", return_value=repo_mock),
-        pytest.raises(InvalidCredentialsError),
-    ):
-        authenticate_user(email, build_password(PasswordKind.WRONG), make_dummy_db())
+    with pytest.raises(InvalidCredentialsError):
+        authenticate_user(
+            email, build_password(PasswordKind.WRONG), repo_mock, MagicMock()
+        )
 
 
-def test_authenticate_user_not_found() -> None:
+def test_authenticate_user_not_found(
+    monkeypatch: pytest.MonkeyPatch, cheap_hash: str
+) -> None:
+    monkeypatch.setattr("app.services.user_service._DUMMY_PASSWORD_HASH", cheap_hash)
     repo_mock = MagicMock(get_by_email=MagicMock(return_value=None))
-    with (
-        patch("app.services.user_service.UserRepository", return_value=repo_mock),
-        pytest.raises(InvalidCredentialsError),
-    ):
+    with pytest.raises(InvalidCredentialsError):
         authenticate_user(
             "no@user",
             build_password(PasswordKind.VALID),
-            make_dummy_db(),
+            repo_mock,
+            MagicMock(),
         )
 
 
+def test_authenticate_user_not_found_still_verifies_dummy_hash() -> None:
+    repo_mock = MagicMock(get_by_email=MagicMock(return_value=None))
+    password = build_password(PasswordKind.VALID)
+    with (
+        patch(
+            "app.services.user_service.verify_password", return_value=False
+        ) as verify_mock,
+        pytest.raises(InvalidCredentialsError),
+    ):
+        authenticate_user("no@user", password, repo_mock, MagicMock())
+    verify_mock.assert_called_once()
+    assert verify_mock.call_args.args[0] == password
+    assert verify_mock.call_args.args[1] is user_service._DUMMY_PASSWORD_HASH
+
+
 # ---------- register_user ----------
 def test_register_user_success() -> None:
     name, email, pwd = "Test", "test@example.com", build_password(PasswordKind.VALID)
@@ -169,22 +181,18 @@ def test_register_user_success() -> None:
         get_by_email=MagicMock(return_value=None),
         create=MagicMock(return_value=created),
     )
-    with patch("app.services.user_service.UserRepository", return_value=repo_mock):
-        result = register_user(name, email, pwd, MagicMock())
+    result = register_user(name, email, pwd, repo_mock)
     assert result.email == email
 
 
 def test_register_user_duplicate() -> None:
     repo_mock = MagicMock(get_by_email=MagicMock(return_value=MagicMock()))
-    with (
-        patch("app.services.user_service.UserRepository", return_value=repo_mock),
-        pytest.raises(EmailAlreadyRegisteredError),
-    ):
+    with pytest.raises(EmailAlreadyRegisteredError):
         register_user(
             "Test",
             "dupe@example.com",
             build_password(PasswordKind.VALID),
-            MagicMock(),
+            repo_mock,
         )
 
 
@@ -192,36 +200,41 @@ def test_register_user_duplicate() -> None:
 def test_logout_single_session_revokes_token() -> None:
     user = cast("User", SimpleNamespace(id=1, email="logout@example.com"))
     token = SimpleNamespace(user_id=1, revoked=False)
-    token_repo = MagicMock(get_valid_token=MagicMock(return_value=token))
-    with patch(
-        "app.services.user_service.RefreshTokenRepository",
-        return_value=token_repo,
-    ):
-        logout_single_session(
-            user,
-            make_dummy_db(),
-            refresh_token=join_parts("rtok"),
-        )
-    token_repo.revoke_token.assert_called_once_with(join_parts("rtok"))
+    token_repo = MagicMock(revoke_and_return=MagicMock(return_value=token))
+    logout_single_session(
+        user,
+        token_repo,
+        refresh_token=join_parts("rtok"),
+    )
+    token_repo.revoke_and_return.assert_called_once_with(join_parts("rtok"), user_id=1)
+    token_repo.get_token.assert_not_called()
+
+
+def test_logout_single_session_audit_logs_masked_token(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    caplog.set_level("INFO")
+    user = cast("User", SimpleNamespace(id=1, email="logout@example.com"))
+    token = SimpleNamespace(user_id=1, revoked=False)
+    token_repo = MagicMock(revoke_and_return=MagicMock(return_value=token))
+    logout_single_session(user, token_repo, refresh_token=join_parts("abcd", "wxyz1"))
+    (record,) = _audit_records(caplog)
+    assert record["events"][0]["event_type"] == "revoke"
+    assert record["events"][0]["token"] == join_parts("abcd", "...", "xyz1")
 
 
 def test_logout_single_session_revoked_token() -> None:
     user = cast("User", SimpleNamespace(id=1))
     token_repo = MagicMock(
-        get_valid_token=MagicMock(
+        revoke_and_return=MagicMock(return_value=None),
+        get_token=MagicMock(
             return_value=SimpleNamespace(user_id=1, revoked=True),
         ),
     )
-    with (
-        patch(
-            "app.services.user_service.RefreshTokenRepository",
-            return_value=token_repo,
-        ),
-        pytest.raises(LogoutNoSessionError),
-    ):
+    with pytest.raises(LogoutNoSessionError):
         logout_single_session(
             user,
-            make_dummy_db(),
+            token_repo,
             refresh_token=join_parts("rtok"),
         )
 
@@ -229,20 +242,15 @@ def test_logout_single_session_revoked_token() -> None:
 def test_logout_single_session_user_mismatch() -> None:
     user = cast("User", SimpleNamespace(id=2))
     token_repo = MagicMock(
-        get_valid_token=MagicMock(
+        revoke_and_return=MagicMock(return_value=None),
+        get_token=MagicMock(
             return_value=SimpleNamespace(user_id=1, revoked=False),
         ),
     )
-    with (
-        patch(
-            "app.services.user_service.RefreshTokenRepository",
-            return_value=token_repo,
-        ),
-        pytest.raises(LogoutNoSessionError),
-    ):
+    with pytest.raises(LogoutNoSessionError):
         logout_single_session(
             user,
-            make_dummy_db(),
+            token_repo,
             refresh_token=join_parts("rtok"),
         )
 
@@ -250,18 +258,13 @@ def test_logout_single_session_user_mismatch() -> None:
 def test_logout_db_error_fetch_translates_to_logout_operation_error() -> None:
     user = cast("User", SimpleNamespace(id=1))
     token_repo = MagicMock(
-        get_valid_token=MagicMock(side_effect=SQLAlchemyError("db boom")),
+        revoke_and_return=MagicMock(return_value=None),
+        get_token=MagicMock(side_effect=SQLAlchemyError("db boom")),
     )
-    with (
-        patch(
-            "app.services.user_service.RefreshTokenRepository",
-            return_value=token_repo,
-        ),
-        pytest.raises(LogoutOperationError),
-    ):
+    with pytest.raises(LogoutOperationError):
         logout_single_session(
             user,
-            make_dummy_db(),
+            token_repo,
             refresh_token=join_parts("rtok"),
         )
 
@@ -269,37 +272,56 @@ def test_logout_db_error_fetch_translates_to_logout_operation_error() -> None:
 def test_logout_db_error_revoke_translates_to_logout_operation_error() -> None:
     user = cast("User", SimpleNamespace(id=1))
     token_repo = MagicMock(
-        get_valid_token=MagicMock(
-            return_value=SimpleNamespace(user_id=1, revoked=False),
-        ),
-        revoke_token=MagicMock(side_effect=SQLAlchemyError("db boom")),
+        revoke_and_return=MagicMock(side_effect=SQLAlchemyError("db boom")),
     )
-    with (
-        patch(
-            "app.services.user_service.RefreshTokenRepository",
-            return_value=token_repo,
-        ),
-        pytest.raises(LogoutOperationError),
-    ):
+    with pytest.raises(LogoutOperationError):
         logout_single_session(
             user,
-            make_dummy_db(),
+            token_repo,
             refresh_token=join_parts("rtok"),
         )
 
 
+def test_logout_single_session_token_usable_on_reread_is_no_session() -> None:
+    user = cast("User", SimpleNamespace(id=1))
+    token_repo = MagicMock(
+        revoke_and_return=MagicMock(return_value=None),
+        get_token=MagicMock(return_value=SimpleNamespace(user_id=1, revoked=False)),
+    )
+    with pytest.raises(LogoutNoSessionError):
+        logout_single_session(user, token_repo, refresh_token=join_parts("rtok"))
+
+
+def test_logout_single_session_unknown_token() -> None:
+    user = cast("User", SimpleNamespace(id=1))
+    token_repo = MagicMock(
+        revoke_and_return=MagicMock(return_value=None),
+        get_token=MagicMock(return_value=None),
+    )
+    with pytest.raises(LogoutNoSessionError):
+        logout_single_session(user, token_repo, refresh_token=join_parts("rtok"))
+
+
 # ---------- logout_all_sessions ----------
 def test_logout_all_sessions_calls_repo() -> None:
     user = cast("User", SimpleNamespace(id=99))
     token_repo = MagicMock()
-    with patch(
-        "app.services.user_service.RefreshTokenRepository",
-        return_value=token_repo,
-    ):
-        logout_all_sessions(user, make_dummy_db())
+    logout_all_sessions(user, token_repo)
     token_repo.revoke_all_tokens.assert_called_once_with(99)
 
 
+def test_audit_entry_not_built_when_audit_level_disabled() -> None:
+    user = cast("User", SimpleNamespace(id=99))
+    with (
+        patch("app.services.user_service.audit_logger") as logger_mock,
+        patch("app.services.user_service._build_refresh_token_event") as build_mock,
+    ):
+        logger_mock.is_enabled_for.return_value = False
+        logout_all_sessions(user, MagicMock())
+    build_mock.assert_not_called()
+    logger_mock.log.assert_not_called()
+
+
 # ---------- rotate_refresh_token ----------
 def _build_token(
     user_id: int = 1,
@@ -322,83 +344,59 @@ def _build_token(
 
 def test_rotate_refresh_token_invalid() -> None:
     # No valid token found -> InvalidCredentialsError
-    token_repo = MagicMock(get_valid_token=MagicMock(return_value=None))
-    with (
-        patch(
-            "app.services.user_service.RefreshTokenRepository",
-            return_value=token_repo,
-        ),
-        pytest.raises(InvalidCredentialsError),
-    ):
-        rotate_refresh_token("badtoken", make_dummy_db())
+    token_repo = MagicMock(
+        revoke_and_return=MagicMock(return_value=None),
+        get_token=MagicMock(return_value=None),
+    )
+    with pytest.raises(InvalidCredentialsError):
+        rotate_refresh_token("badtoken", token_repo, MagicMock())
 
 
 def test_rotate_refresh_token_revoked() -> None:
     token_repo = MagicMock(
-        get_valid_token=MagicMock(return_value=_build_token(revoked=True)),
+        revoke_and_return=MagicMock(return_value=None),
+        get_token=MagicMock(return_value=_build_token(revoked=True)),
     )
-    with (
-        patch(
-            "app.services.user_service.RefreshTokenRepository",
-            return_value=token_repo,
-        ),
-        pytest.raises(InvalidCredentialsError),
-    ):
-        rotate_refresh_token("old", make_dummy_db())
+    with pytest.raises(InvalidCredentialsError):
+        rotate_refresh_token("old", token_repo, MagicMock())
 
 
 def test_rotate_refresh_token_expired() -> None:
     token_repo = MagicMock(
-        get_valid_token=MagicMock(
+        revoke_and_return=MagicMock(return_value=None),
+        get_token=MagicMock(
             return_value=_build_token(expires_delta=timedelta(minutes=-1)),
         ),
     )
-    with (
-        patch(
-            "app.services.user_service.RefreshTokenRepository",
-            return_value=token_repo,
-        ),
-        pytest.raises(InvalidCredentialsError),
-    ):
-        rotate_refresh_token("old", make_dummy_db())
+    with pytest.raises(InvalidCredentialsError):
+        rotate_refresh_token("old", token_repo, MagicMock())
 
 
 def test_rotate_refresh_token_user_not_found() -> None:
-    token_repo = MagicMock(get_valid_token=MagicMock(return_value=_build_token()))
+    token_repo = MagicMock(revoke_and_return=MagicMock(return_value=_build_token()))
     user_repo = MagicMock(get_by_id=MagicMock(return_value=None))
-    with (
-        patch(
-            "app.services.user_service.RefreshTokenRepository",
-            return_value=token_repo,
-        ),
-        patch("app.services.user_service.UserRepository", return_value=user_repo),
-        pytest.raises(InvalidCredentialsError),
-    ):
-        rotate_refresh_token("old", make_dummy_db())
+    with pytest.raises(InvalidCredentialsError):
+        rotate_refresh_token("old", token_repo, user_repo)
 
 
 def test_rotate_refresh_token_success_and_single_use() -> None:
     valid = _build_token(user_id=1, ua="test-agent", ip="127.0.0.1")
-    token_repo = MagicMock(get_valid_token=MagicMock(return_value=valid))
+    token_repo = MagicMock(revoke_and_return=MagicMock(return_value=valid))
     user_repo = MagicMock(
         get_by_id=MagicMock(return_value=SimpleNamespace(id=1, email="e@x.com")),
     )
-    with (
-        patch(
-            "app.services.user_service.RefreshTokenRepository",
-            return_value=token_repo,
-        ),
-        patch("app.services.user_service.UserRepository", return_value=user_repo),
-    ):
-        atok, rtok = rotate_refresh_token(
-            "oldtoken",
-            make_dummy_db(),
-            user_agent="test-agent",
-            ip_address="127.0.0.1",
-        )
-    assert isinstance(atok, str)
-    assert isinstance(rtok, str)
-    token_repo.revoke_token.assert_called_once_with("oldtoken")
+    tokens = rotate_refresh_token(
+        "oldtoken",
+        token_repo,
+        user_repo,
+        user_agent="test-agent",
+        ip_address="127.0.0.1",
+    )
+    assert isinstance(tokens.access_token, str)
+    assert isinstance(tokens.refresh_token, str)
+    token_repo.revoke_and_return.assert_called_once_with(
+        "oldtoken", active_at=ANY, commit=False
+    )
     token_repo.add_token.assert_called_once()
     # Validate user agent and IP propagated to add_token
     _, kwargs = token_repo.add_token.call_args
@@ -410,27 +408,21 @@ def test_rotate_refresh_token_anomaly_logs_but_succeeds(
     caplog: pytest.LogCaptureFixture,
 ) -> None:
     valid = _build_token(user_id=1, ua="expected", ip="1.2.3.4")
-    token_repo = MagicMock(get_valid_token=MagicMock(return_value=valid))
+    token_repo = MagicMock(revoke_and_return=MagicMock(return_value=valid))
     user_repo = MagicMock(
         get_by_id=MagicMock(return_value=SimpleNamespace(id=1, email="e@x.com")),
     )
-    with (
-        patch(
-            "app.services.user_service.RefreshTokenRepository",
-            return_value=token_repo,
-        ),
-        patch("app.services.user_service.UserRepository", return_value=user_repo),
-    ):
-        caplog.set_level("WARNING")
-        atok, rtok = rotate_refresh_token(
-            "old",
-            make_dummy_db(),
-            user_agent="unexpected",
-            ip_address="9.8.7.6",
-        )
-    assert isinstance(atok, str)
-    assert isinstance(rtok, str)
-    assert token_repo.revoke_token.called
+    caplog.set_level("WARNING")
+    tokens = rotate_refresh_token(
+        "old",
+        token_repo,
+        user_repo,
+        user_agent="unexpected",
+        ip_address="9.8.7.6",
+    )
+    assert isinstance(tokens.access_token, str)
+    assert isinstance(tokens.refresh_token, str)
+    assert token_repo.revoke_and_return.called
     # Two warnings expected: UA anomaly and IP anomaly
     warnings = [rec for rec in caplog.records if rec.levelname == "WARNING"]
     # We can't rely on exact message text from structlog JSON,
@@ -445,7 +437,7 @@ def test_rotate_refresh_token_sliding_expiration(
     # max lifetime 10 days -> new expiry
     # should be <= created+10d
     valid = _build_token(created_delta=timedelta(days=-9))
-    token_repo = MagicMock(get_valid_token=MagicMock(return_value=valid))
+    token_repo = MagicMock(revoke_and_return=MagicMock(return_value=valid))
     user_repo = MagicMock(
         get_by_id=MagicMock(return_value=SimpleNamespace(id=1, email="e@x.com")),
     )
@@ -453,14 +445,7 @@ def test_rotate_refresh_token_sliding_expiration(
 
     monkeypatch.setattr(cfg.settings, "REFRESH_TOKEN_EXPIRE_DAYS", 7)
     monkeypatch.setattr(cfg.settings, "REFRESH_TOKEN_MAX_LIFETIME_DAYS", 10)
-    with (
-        patch(
-            "app.services.user_service.RefreshTokenRepository",
-            return_value=token_repo,
-        ),
-        patch("app.services.user_service.UserRepository", return_value=user_repo),
-    ):
-        rotate_refresh_token("old", make_dummy_db())
+    rotate_refresh_token("old", token_repo, user_repo)
     # Assert add_token called with expiry <= created_at + max_lifetime
     assert token_repo.add_token.called
     args, _ = token_repo.add_token.call_args
@@ -476,27 +461,23 @@ def test_rotate_refresh_token_anomaly_ip_only_logs_but_succeeds(
 ) -> None:
     """If only IP mismatches, rotation still succeeds (anomaly is logged)."""
     valid = _build_token(user_id=1, ua="expected", ip="1.2.3.4")
-    token_repo = MagicMock(get_valid_token=MagicMock(return_value=valid))
+    token_repo = MagicMock(revoke_and_return=MagicMock(return_value=valid))
     user_repo = MagicMock(
         get_by_id=MagicMock(return_value=SimpleNamespace(id=1, email="e@x.com")),
     )
-    with (
-        patch(
-            "app.services.user_service.RefreshTokenRepository",
-            return_value=token_repo,
-        ),
-        patch("app.services.user_service.UserRepository", return_value=user_repo),
-    ):
-        caplog.set_level("WARNING")
-        atok, rtok = rotate_refresh_token(
-            "old",
-            make_dummy_db(),
-            user_agent="expected",  # matches
-            ip_address="9.9.9.9",  # mismatch
-        )
-    assert isinstance(atok, str)
-    assert isinstance(rtok, str)
-    token_repo.revoke_token.assert_called_once_with("old")
+    caplog.set_level("WARNING")
+    tokens = rotate_refresh_token(
+        "old",
+        token_repo,
+        user_repo,
+        user_agent="expected",  # matches
+        ip_address="9.9.9.9",  # mismatch
+    )
+    assert isinstance(tokens.access_token, str)
+    assert isinstance(tokens.refresh_token, str)
+    token_repo.revoke_and_return.assert_called_once_with(
+        "old", active_at=ANY, commit=False
+    )
     token_repo.add_token.assert_called_once()
     warnings = [rec for rec in caplog.records if rec.levelname == "WARNING"]
     assert len(warnings) >= 1
@@ -505,26 +486,22 @@ def test_rotate_refresh_token_anomaly_ip_only_logs_but_succeeds(
 def test_rotate_refresh_token_no_metadata_provided_succeeds() -> None:
     """Rotation succeeds even if client omits UA/IP; no anomaly should be triggered."""
     valid = _build_token(user_id=1, ua="some-ua", ip="10.0.0.1")
-    token_repo = MagicMock(get_valid_token=MagicMock(return_value=valid))
+    token_repo = MagicMock(revoke_and_return=MagicMock(return_value=valid))
     user_repo = MagicMock(
         get_by_id=MagicMock(return_value=SimpleNamespace(id=1, email="e@x.com")),
     )
-    with (
-        patch(
-            "app.services.user_service.RefreshTokenRepository",
-            return_value=token_repo,
-        ),
-        patch("app.services.user_service.UserRepository", return_value=user_repo),
-    ):
-        atok, rtok = rotate_refresh_token(
-            "old",
-            make_dummy_db(),
-            user_agent=None,
-            ip_address=None,
-        )
-    assert isinstance(atok, str)
-    assert isinstance(rtok, str)
-    token_repo.revoke_token.assert_called_once_with("old")
+    tokens = rotate_refresh_token(
+        "old",
+        token_repo,
+        user_repo,
+        user_agent=None,
+        ip_address=None,
+    )
+    assert isinstance(tokens.access_token, str)
+    assert isinstance(tokens.refresh_token, str)
+    token_repo.revoke_and_return.assert_called_once_with(
+        "old", active_at=ANY, commit=False
+    )
     token_repo.add_token.assert_called_once()
 
 
@@ -533,27 +510,23 @@ def test_rotate_refresh_token_anomaly_ua_only_logs_but_succeeds(
 ) -> None:
     """If only UA mismatches, rotation still succeeds (anomaly is logged)."""
     valid = _build_token(user_id=1, ua="expected", ip="1.2.3.4")
-    token_repo = MagicMock(get_valid_token=MagicMock(return_value=valid))
+    token_repo = MagicMock(revoke_and_return=MagicMock(return_value=valid))
     user_repo = MagicMock(
         get_by_id=MagicMock(return_value=SimpleNamespace(id=1, email="e@x.com")),
     )
-    with (
-        patch(
-            "app.services.user_service.RefreshTokenRepository",
-            return_value=token_repo,
-        ),
-        patch("app.services.user_service.UserRepository", return_value=user_repo),
-    ):
-        caplog.set_level("WARNING")
-        atok, rtok = rotate_refresh_token(
-            "old",
-            make_dummy_db(),
-            user_agent="unexpected",  # mismatch
-            ip_address="1.2.3.4",  # matches
-        )
-    assert isinstance(atok, str)
-    assert isinstance(rtok, str)
-    token_repo.revoke_token.assert_called_once_with("old")
+    caplog.set_level("WARNING")
+    tokens = rotate_refresh_token(
+        "old",
+        token_repo,
+        user_repo,
+        user_agent="unexpected",  # mismatch
+        ip_address="1.2.3.4",  # matches
+    )
+    assert isinstance(tokens.access_token, str)
+    assert isinstance(tokens.refresh_token, str)
+    token_repo.revoke_and_return.assert_called_once_with(
+        "old", active_at=ANY, commit=False
+    )
     token_repo.add_token.assert_called_once()
     warnings = [rec for rec in caplog.records if rec.levelname == "WARNING"]
     assert len(warnings) >= 1
@@ -586,18 +559,159 @@ def test_rotate_refresh_token_sliding_within_window(
         user_agent=None,
         ip_address=None,
     )
-    token_repo = MagicMock(get_valid_token=MagicMock(return_value=valid_token))
+    token_repo = MagicMock(revoke_and_return=MagicMock(return_value=valid_token))
     user_repo = MagicMock(
         get_by_id=MagicMock(return_value=SimpleNamespace(id=1, email="e@x.com")),
     )
-    with (
-        patch(
-            "app.services.user_service.RefreshTokenRepository", return_value=token_repo
-        ),
-        patch("app.services.user_service.UserRepository", return_value=user_repo),
-    ):
-        rotate_refresh_token("old", make_dummy_db())
+    rotate_refresh_token("old", token_repo, user_repo)
     assert token_repo.add_token.called
     args, _ = token_repo.add_token.call_args
     new_expiry = args[2]
     assert new_expiry == fixed_now + timedelta(days=7)
+
+
+def test_rotate_refresh_token_emits_single_audit_record(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    valid = _build_token(user_id=1, ua="expected", ip="1.2.3.4")
+    token_repo = MagicMock(revoke_and_return=MagicMock(return_value=valid))
+    user_repo = MagicMock(
+        get_by_id=MagicMock(return_value=SimpleNamespace(id=1, email="e@x.com")),
+    )
+    caplog.set_level("INFO")
+    rotate_refresh_token(
+        join_parts("old-refresh-token"),
+        token_repo,
+        user_repo,
+        user_agent="unexpected",
+        ip_address="9.8.7.6",
+    )
+    records = _audit_records(caplog)
+    assert len(records) == 1
+    event_types = [e["event_type"] for e in records[0]["events"]]
+    assert event_types == ["anomaly", "anomaly", "rotate", "create"]
+    assert "timestamp" in records[0]
+    assert all("timestamp" not in e for e in records[0]["events"])
+    assert records[0]["events"][2]["token"] == join_parts("old-", "...", "oken")
+
+
+def test_rotate_refresh_token_masks_each_token_once() -> None:
+    token_repo = MagicMock(revoke_and_return=MagicMock(return_value=_build_token()))
+    user_repo = MagicMock(
+        get_by_id=MagicMock(return_value=SimpleNamespace(id=1, email="e@x.com")),
+    )
+    with patch("app.services.user_service.mask_token", return_value="m") as mask_mock:
+        tokens = rotate_refresh_token(
+            "old", token_repo, user_repo, user_agent="a", ip_address="1.1.1.1"
+        )
+    masked = [c.args[0] for c in mask_mock.call_args_list]
+    assert masked == ["old", tokens.refresh_token]
+
+
+def test_rotate_refresh_token_validation_failure_logs_json_audit(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    caplog.set_level("INFO")
+    token_repo = MagicMock(
+        revoke_and_return=MagicMock(return_value=None),
+        get_token=MagicMock(return_value=None),
+    )
+    with pytest.raises(InvalidCredentialsError):
+        rotate_refresh_token(join_parts("bad-refresh-token"), token_repo, MagicMock())
+    records = _audit_records(caplog)
+    assert len(records) == 1
+    (event,) = records[0]["events"]
+    assert event["event_type"] == "suspicious"
+    assert event["details"] == {"reason": "invalid or revoked token used for rotation"}
+
+
+def test_rotate_refresh_token_revoked_token_reuse_is_audited(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    caplog.set_level("INFO")
+    token_repo = MagicMock(
+        revoke_and_return=MagicMock(return_value=None),
+        get_token=MagicMock(return_value=_build_token(user_id=5, revoked=True)),
+    )
+    with pytest.raises(InvalidCredentialsError):
+        rotate_refresh_token("old", token_repo, MagicMock())
+    (record,) = _audit_records(caplog)
+    (event,) = record["events"]
+    assert event["user_id"] == 5
+    assert event["details"] == {"reason": "revoked token used for rotation"}
+
+
+def test_rotate_refresh_token_usable_on_reread_is_rejected() -> None:
+    token_repo = MagicMock(
+        revoke_and_return=MagicMock(return_value=None),
+        get_token=MagicMock(return_value=_build_token()),
+    )
+    with pytest.raises(InvalidCredentialsError):
+        rotate_refresh_token("old", token_repo, MagicMock())
+    token_repo.add_token.assert_not_called()
+
+
+def test_rotate_refresh_token_flushes_audit_events_on_failure(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    caplog.set_level("INFO")
+    token_repo = MagicMock(revoke_and_return=MagicMock(return_value=_build_token()))
+    user_repo = MagicMock(get_by_id=MagicMock(return_value=None))
+    with pytest.raises(InvalidCredentialsError):
+        rotate_refresh_token("old", token_repo, user_repo)
+    records = _audit_records(caplog)
+    assert len(records) == 1
+    event_types = [e["event_type"] for e in records[0]["events"]]
+    # The revoke was rolled back, so no rotation is audited
+    assert event_types == ["suspicious"]
+
+
+def test_rotate_refresh_token_retries_insert_on_conflict() -> None:
+    token_repo = MagicMock(
+        revoke_and_return=MagicMock(return_value=_build_token()),
+        add_token=MagicMock(side_effect=[False, True]),
+    )
+    user_repo = MagicMock(
+        get_by_id=MagicMock(return_value=SimpleNamespace(id=1, email="e@x.com")),
+    )
+    tokens = rotate_refresh_token("old", token_repo, user_repo)
+    assert token_repo.add_token.call_count == 2
+    assert token_repo.add_token.call_args[0][1] == tokens.refresh_token
+    assert len(tokens.refresh_token) == 43
+
+
+def test_rotate_refresh_token_gives_up_after_repeated_conflicts() -> None:
+    token_repo = MagicMock(
+        revoke_and_return=MagicMock(return_value=_build_token()),
+        add_token=MagicMock(return_value=False),
+    )
+    user_repo = MagicMock(
+        get_by_id=MagicMock(return_value=SimpleNamespace(id=1, email="e@x.com")),
+    )
+    with pytest.raises(RuntimeError):
+        rotate_refresh_token("old", token_repo, user_repo)
+    token_repo.rollback.assert_called_once()
+
+
+def test_rotate_refresh_token_exhausted_retries_do_not_commit_revoke() -> None:
+    db = make_db_commit_mock()
+    now = datetime.now(UTC)
+    db.execute.return_value.one_or_none.return_value = SimpleNamespace(
+        _asdict=lambda: {
+            "id": 1,
+            "user_id": 1,
+            "created_at": now,
+            "expires_at": now + timedelta(days=1),
+            "user_agent": None,
+            "ip_address": None,
+        }
+    )
+    # Every insert attempt hits an existing token hash
+    db.execute.return_value.scalar_one_or_none.return_value = None
+    user_repo = MagicMock(
+        get_by_id=MagicMock(return_value=SimpleNamespace(id=1, email="e@x.com")),
+    )
+    with pytest.raises(RuntimeError):
+        rotate_refresh_token("old", RefreshTokenRepository(db), user_repo)
+    db.commit.assert_not_called()
+    db.rollback.assert_called_once()
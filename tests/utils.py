@@ -2,6 +2,7 @@
 
 This module provides:
 - Minimal SQLAlchemy-like DB doubles for common query/commit flows.
+- ``FakeRequest``, a stand-in for the request attributes read by helpers.
 - Deterministic string builders for tokens, basic auth, and passwords.
 
 Public string helpers:
@@ -14,7 +15,8 @@ MISSING_SYMBOL, MISSING_NUMBER.
 Use these helpers to generate repeatable, non-secret values in tests.
 """
 
-from collections.abc import Sequence
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
 from enum import Enum
 from unittest.mock import MagicMock
 
@@ -30,6 +32,13 @@ def make_db_query_first(result: object) -> MagicMock:
     return db
 
 
+def make_db_get(result: object) -> MagicMock:
+    """Create a DB mock where ``get(Model, pk)`` returns ``result``."""
+    db: MagicMock = MagicMock()
+    db.get.return_value = result
+    return db
+
+
 def make_db_query_all(results: Sequence[object]) -> MagicMock:
     """Create a DB mock where query(...).filter(...).all() returns ``results``."""
     db: MagicMock = MagicMock()
@@ -59,6 +68,14 @@ def make_db_commit_mock() -> MagicMock:
     return db
 
 
+@dataclass(frozen=True, slots=True)
+class FakeRequest:
+    """Stand-in for the ``headers`` and ``client`` attributes of a ``Request``."""
+
+    headers: Mapping[str, str] = field(default_factory=dict)
+    client: object = None
+
+
 def make_dummy_db() -> MagicMock:
     """Create a minimal DB placeholder for tests not asserting DB behavior."""
     return MagicMock()